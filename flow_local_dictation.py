@@ -1,5 +1,13 @@
 import os, subprocess, time, threading, queue, datetime, shlex
-import sys, shutil, tempfile, uuid
+import sys, shutil, tempfile, uuid, glob
+import hashlib
+import collections
+import contextlib
+import http.client
+import socket
+import concurrent.futures
+import io
+import ctypes.util
 import sounddevice as sd
 import soundfile as sf
 import keyboard
@@ -14,6 +22,7 @@ import pystray
 import re
 import json
 import math
+import platform
 
 # ============================================================================
 # THEME CONSTANTS - Pink/Black Dark Mode
@@ -215,6 +224,10 @@ if not os.path.isfile(_default_bin):
 os.environ.setdefault("FLOW_WHISPER_BIN", _default_bin)
 os.environ.setdefault("WHISPER_BIN", os.environ["FLOW_WHISPER_BIN"])
 os.environ.setdefault("FLOW_WHISPER_ARGS", "-ngl 99")
+# "cli" spawns whisper-cli per utterance; "server" keeps a resident whisper-server;
+# "lib" loads whisper.dll in-process (FLOW_WHISPER_LIB); "ct2" runs a CTranslate2
+# int8 model on CPU via faster-whisper (FLOW_CT2_MODEL)
+os.environ.setdefault("FLOW_ENGINE", "cli")
 
 _bin = os.environ.get("FLOW_WHISPER_BIN")
 if _bin and not os.path.isfile(_bin):
@@ -241,15 +254,12 @@ def _acquire_single_instance():
         print("Already running. Exiting.")
         sys.exit(0)
 
-_acquire_single_instance()
-
 # --- Config ---
 MODEL_PATH_REL = os.path.join("models", "ggml-large-v3.bin")  # upgraded model for better accuracy
 WHISPER_BIN = os.environ.get("WHISPER_BIN") or os.path.join(".", "main.exe")
 SAMPLE_RATE = 16000
 CHANNELS = 1
-WAV_TMP = "flow_input.wav"
-TEXT_TMP_BASE = "flow_out"  # base name for whisper-cli text output
+WAV_TMP = "flow_input.wav"  # only written when FLOW_DEBUG_AUDIO=1
 HOTKEY_HOLD = "windows+ctrl"    # hold to talk; release to transcribe
 NOTIFY = True
 
@@ -264,8 +274,26 @@ MODE_BULLET_NEXT = False  # one-shot list maker (also triggered by keywords)
 # Can also be set via env var FLOW_INPUT_DEVICE (e.g., "2" or "USB").
 INPUT_DEVICE = os.environ.get("FLOW_INPUT_DEVICE", None)
 
-# Timeout for whisper subprocess (seconds)
+# Timeout for whisper subprocess (seconds); transcription jobs of known length
+# get JOB_TIMEOUT_BASE_SEC plus JOB_TIMEOUT_PER_AUDIO_SEC per second of audio
 WHISPER_TIMEOUT_SEC = 120
+JOB_TIMEOUT_BASE_SEC = 45.0
+JOB_TIMEOUT_PER_AUDIO_SEC = 3.0
+JOB_STALE_SEC = 30.0            # a new recording pre-empts a job running this long past its audio length
+CANCEL_HOTKEY = "ctrl+alt+x"    # cancels the transcription in progress (so does clicking the pill)
+
+# Transcription engine (see FLOW_ENGINE above)
+ENGINE = os.environ.get("FLOW_ENGINE", "cli").strip().lower()
+RESIDENT_ENGINES = ("server", "lib", "ct2")
+
+# Resident whisper-server settings (ENGINE == "server")
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = int(os.environ.get("FLOW_SERVER_PORT", "8178"))
+SERVER_STARTUP_TIMEOUT_SEC = 180    # cold load of large-v3 from a slow disk
+SERVER_HEALTH_INTERVAL_SEC = 5.0
+SERVER_MAX_RESPAWNS = 3             # per SERVER_RESPAWN_WINDOW_SEC before giving up
+SERVER_RESPAWN_WINDOW_SEC = 300
+SERVER_LOG_FILE = "whisper_server.log"
 
 # Silence detection during recording (on normalized float32 audio)
 SILENCE_RMS_THRESHOLD = 0.008
@@ -274,6 +302,84 @@ MIN_SPOKEN_BLOCKS = 3
 # Log file for diagnostics
 LOG_FILE = "flow.log"
 
+# Keep a copy of each utterance in WAV_TMP for inspection (FLOW_DEBUG_AUDIO=1)
+DEBUG_AUDIO = os.environ.get("FLOW_DEBUG_AUDIO", "") == "1"
+
+# Streaming mode: decode overlapping windows while the hotkey is held (FLOW_STREAMING=1)
+STREAMING = os.environ.get("FLOW_STREAMING", "") == "1"
+STREAM_WINDOW_SEC = 20.0
+STREAM_OVERLAP_SEC = 2.0
+
+# GPU circuit breaker: skip the GPU after repeated failures, probe again after a cool-down
+GPU_BREAKER_FILE = os.path.join(_script_dir, "gpu_breaker.json")
+GPU_BREAKER_THRESHOLD = 3
+GPU_BREAKER_COOLDOWN_SEC = 30 * 60
+GPU_BREAKER_MAX_COOLDOWN_SEC = 24 * 3600
+
+# Per-utterance model routing (FLOW_MODEL_ROUTING=1) with FLOW_ACCURACY = speed | balanced | accuracy
+MODEL_ROUTING = os.environ.get("FLOW_MODEL_ROUTING", "") == "1"
+ACCURACY_PREF = os.environ.get("FLOW_ACCURACY", "balanced").strip().lower()
+MODEL_TIERS = ["ggml-base.en.bin", "ggml-medium.en.bin", "ggml-large-v3.bin"]  # fastest first
+# Utterances shorter than (first, second) seconds go to tier 0 / tier 1, longer ones to tier 2
+ROUTE_THRESHOLDS = {
+    "speed": (10.0, float("inf")),
+    "balanced": (5.0, 20.0),
+    "accuracy": (2.0, 8.0),
+}
+# Resident models kept loaded at once (server/lib engines): every routing tier,
+# so a tier switch never reloads on the hot path; else the main and draft model
+MODEL_CACHE_MAX = len(MODEL_TIERS) if MODEL_ROUTING else 2
+
+# Long recordings are cut on pauses into ~CHUNK_SEC pieces decoded in parallel (FLOW_CHUNKING=1)
+CHUNKING = os.environ.get("FLOW_CHUNKING", "") == "1"
+CHUNK_WORKERS = int(os.environ.get("FLOW_CHUNK_WORKERS", "2"))
+CHUNK_MIN_SEC = 45.0        # shorter audio is decoded in one piece
+CHUNK_SEC = 25.0
+CHUNK_SEARCH_SEC = 3.0      # look this far either side of a boundary for the quietest cut
+CHUNK_OVERLAP_SEC = 1.0
+
+# Hardware autotune (`python flow_local_dictation.py autotune`): fastest -t / flash-attn / -p
+# per machine, model and device; without a profile whisper-cli gets one thread per physical core
+HW_PROFILE_FILE = os.path.join(_script_dir, "hw_profile.json")
+AUTOTUNE_CLIP = os.path.join("whisper.cpp", "samples", "jfk.wav")
+
+# Transcripts of audio files, keyed by PCM hash + model + binary + params (FLOW_TRANSCRIPT_CACHE=0 disables)
+TRANSCRIPT_CACHE = os.environ.get("FLOW_TRANSCRIPT_CACHE", "1") == "1"
+TRANSCRIPT_CACHE_DIR = os.path.join(_script_dir, "transcript_cache")
+TRANSCRIPT_CACHE_MAX_MB = 20
+
+# Headless batch mode (`python flow_local_dictation.py batch <dir|glob>`)
+BATCH_WORKERS = int(os.environ.get("FLOW_BATCH_WORKERS", "2"))
+BATCH_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg")
+BATCH_OUT = "transcripts.jsonl"
+PIN_CORES_PER_WORKER = 4   # batch --pin: default worker count is physical cores / this
+
+# Dictation queue: finished recordings wait here while the next one is captured
+JOB_BACKLOG_MAX = int(os.environ.get("FLOW_JOB_BACKLOG", "4"))
+JOB_WORKERS = int(os.environ.get("FLOW_JOB_WORKERS", "1"))
+
+# Draft-then-refine: paste a fast base.en result, then upgrade it with MODEL_PATH (FLOW_DRAFT_REFINE=1)
+DRAFT_REFINE = os.environ.get("FLOW_DRAFT_REFINE", "") == "1"
+DRAFT_MODEL_REL = os.path.join("models", "ggml-base.en.bin")
+REFINE_HOTKEY = "ctrl+alt+r"   # applies a refinement that could not be swapped in automatically
+
+# Latency-budget parameter tuning (FLOW_LATENCY_BUDGET seconds after release; 0 = fixed table)
+LATENCY_BUDGET_SEC = float(os.environ.get("FLOW_LATENCY_BUDGET", "0") or 0)
+TIMINGS_FILE = os.path.join(_script_dir, "whisper_timings.jsonl")
+TUNER_MIN_RUNS = 8
+TUNER_MAX_RECORDS = 2000
+BEAM_COST = 0.2   # assumed extra decode cost per additional beam, relative to greedy
+# (beam_size, best_of) from most to least accurate
+PARAM_LADDER = [(8, 5), (6, 5), (5, 3), (5, None), (3, 2), (2, None), (1, None)]
+
+# Hedged GPU/CPU race: start a CPU decode when the GPU run is slow or flaky (FLOW_HEDGE=1)
+HEDGE = os.environ.get("FLOW_HEDGE", "") == "1"
+HEDGE_MIN_SAMPLES = 5   # GPU runs per duration class before its p95 is trusted
+
+# Start the engine on key-down so model load overlaps speech (FLOW_PRELAUNCH=0 disables)
+PRELAUNCH = os.environ.get("FLOW_PRELAUNCH", "1") != "0"
+PRELAUNCH_IDLE_SEC = 120
+
 # Whisper binary detection candidates (prefer whisper-cli.exe in script directory)
 _script_dir = os.path.dirname(os.path.abspath(__file__)) or "."
 WHISPER_CANDIDATES = [
@@ -285,21 +391,39 @@ WHISPER_CANDIDATES = [
     os.path.join("whisper.cpp", "build", "bin", "Debug", "whisper-cli.exe"),
 ]
 
+# whisper-server detection candidates (FLOW_WHISPER_SERVER_BIN takes precedence)
+SERVER_CANDIDATES = [
+    os.path.join(_script_dir, "whisper-server.exe"),
+    os.path.join(_script_dir, "server.exe"),
+    os.path.join(".", "whisper-server.exe"),
+    os.path.join("whisper.cpp", "build", "bin", "Release", "whisper-server.exe"),
+]
+
+# whisper.cpp shared library candidates for ENGINE == "lib" (FLOW_WHISPER_LIB takes precedence)
+LIB_CANDIDATES = [
+    os.path.join(_script_dir, "whisper.dll"),
+    os.path.join(".", "whisper.dll"),
+    os.path.join("whisper.cpp", "build", "bin", "Release", "whisper.dll"),
+]
+
 # Resolved at startup
 resolved_whisper_bin = None
 
 # Concurrency & debounce
-STATE_LOCK = threading.Lock()
-transcribing_flag = threading.Event()
+STATE_LOCK = threading.Lock()   # guards recording start/stop transitions
+stop_pending = threading.Event()  # set between key release and the end of the post-roll
 last_edge_ts = 0.0
 EDGE_COOLDOWN_MS = 150
 
 recording_flag = threading.Event()
 rec_thread = None
+captured_audio = None  # int16 mono samples (or a spill file path) handed from record_loop() to transcription
+active_stream = None   # StreamingTranscriber for the current recording (STREAMING)
 ui_queue = queue.Queue()
 
 # Resolved device (set at startup diagnostics)
 selected_input_device_idx = None
+selected_input_format = None   # (samplerate, channels) the device is opened with
 selected_input_device_name = None
 
 # Dashboard window reference
@@ -340,6 +464,7 @@ class FloatingPill:
         self.animation_id = None
         self.pulse_phase = 0
         self.glow_intensity = 0
+        self.queue_depth = 0
         
         # Draw initial state
         self._draw_pill("ready")
@@ -418,6 +543,18 @@ class FloatingPill:
             font=(Theme.FONT_FAMILY, 10, "bold"),
             anchor="center"
         )
+
+        # Recordings still being transcribed (a lone job only matters while recording the next)
+        if self.queue_depth > 1 or (self.queue_depth and state == "listening"):
+            bx = w - 18
+            self.canvas.create_oval(bx - 9, dot_y - 9, bx + 9, dot_y + 9, fill=Theme.INFO, outline="")
+            self.canvas.create_text(
+                bx, dot_y,
+                text=str(self.queue_depth),
+                fill=Theme.TEXT_PRIMARY,
+                font=(Theme.FONT_FAMILY, 8, "bold"),
+                anchor="center"
+            )
     
     def _draw_rounded_rect(self, x1, y1, x2, y2, radius, **kwargs):
         """Draw a rounded rectangle on the canvas."""
@@ -528,17 +665,29 @@ class FloatingPill:
         else:
             self._draw_pill(new_state)
     
+    def set_queue_depth(self, depth):
+        """Show how many recordings are waiting to be transcribed."""
+        self.queue_depth = depth
+        if self.current_state != "listening":
+            self._draw_pill(self.current_state)
+    
     def _animate_pulse(self):
         """Animate the pulsing effect for listening state."""
         self.pulse_phase += 0.15
-        pulse = (math.sin(self.pulse_phase) + 1) / 2  # 0 to 1
+        level = level_meter.level()
+        if level is not None:
+            pulse = level   # real input level while a capture stream is running
+        else:
+            pulse = (math.sin(self.pulse_phase) + 1) / 2  # 0 to 1
         self._draw_pill("listening", pulse)
         
         if self.current_state == "listening":
             self.animation_id = self.root.after(50, self._animate_pulse)
     
     def _on_click(self, event):
-        """Handle left click - open dashboard."""
+        """Handle left click - cancel a running transcription, else open dashboard."""
+        if self.current_state == "transcribing" and dictation_queue.cancel_current():
+            return
         self._open_dashboard()
     
     def _on_right_click(self, event):
@@ -1227,6 +1376,7 @@ def open_settings_window(parent):
         os.environ["FLOW_INPUT_DEVICE"] = str(idx)
         resolve_input_device()
         if selected_input_device_idx == idx:
+            open_live_input()   # move the pre-roll stream to the new device
             status_var.set(f"✓ Selected: {selected_input_device_name}")
         else:
             status_var.set("Failed to select device")
@@ -1239,27 +1389,31 @@ def open_settings_window(parent):
             status_var.set("No device selected")
             return
         
+        meter = contextlib.ExitStack()
+        try:
+            meter.enter_context(metering_stream())
+        except Exception as e:
+            status_var.set(f"Error: {str(e)[:30]}")
+            return
+
         test_running[0] = True
         status_var.set("Testing...")
-        
-        def test_audio():
-            try:
-                for _ in range(20):  # Test for 2 seconds
-                    with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype="float32", device=selected_input_device_idx) as stream:
-                        block, _ = stream.read(int(SAMPLE_RATE * 0.1))
-                        rms = float(np.sqrt(np.mean(block * block) + 1e-12))
-                        level_pct = min(rms * 500, 200)  # Scale for visibility
-                        level_bar.coords(level_fill, 0, 0, level_pct, 12)
-                        level_bar.update()
-                        time.sleep(0.1)
-                status_var.set(f"Test complete")
-            except Exception as e:
-                status_var.set(f"Error: {str(e)[:30]}")
-            finally:
-                test_running[0] = False
-                level_bar.coords(level_fill, 0, 0, 0, 12)
-        
-        threading.Thread(target=test_audio, daemon=True).start()
+        ticks = [0]
+
+        def tick():
+            # runs on the Tk thread; the capture callback only publishes levels
+            level = level_meter.level()
+            level_bar.coords(level_fill, 0, 0, (level or 0.0) * 200, 12)
+            ticks[0] += 1
+            if ticks[0] < 20:  # Test for 2 seconds
+                level_bar.after(100, tick)
+                return
+            meter.close()
+            test_running[0] = False
+            level_bar.coords(level_fill, 0, 0, 0, 12)
+            status_var.set("Test complete")
+
+        tick()
     
     create_button(btn_frame, "Refresh", do_refresh).pack(side="left", padx=(0, 8))
     create_button(btn_frame, "Test Mic", do_test).pack(side="left", padx=(0, 8))
@@ -1273,6 +1427,9 @@ def res_path(rel):
 
 # Resolve model path after res_path is defined
 MODEL_PATH = res_path(os.path.join("models", "ggml-large-v3.bin"))
+DRAFT_MODEL = res_path(DRAFT_MODEL_REL)
+# CTranslate2 model directory (or a faster-whisper size name already in the local cache)
+CT2_MODEL = os.environ.get("FLOW_CT2_MODEL") or res_path(os.path.join("models", "faster-whisper-large-v3"))
 model_info_logged = False
 
 def safe_print(*args, **kwargs):
@@ -1306,6 +1463,25 @@ def set_status_safe(text, bg, fg="#ffffff", border=None):
         pass
 
 
+def set_job_status(text, bg, fg="#ffffff", border=None):
+    """Status change from a transcription job; the pill keeps showing a recording in progress."""
+    if not recording_flag.is_set():
+        set_status_safe(text, bg, fg, border)
+
+
+def capturing():
+    """True from hotkey press until the recording has been handed over."""
+    return recording_flag.is_set() or stop_pending.is_set()
+
+
+def settle_status():
+    """Return the pill to Processing while jobs remain, else to Ready."""
+    if dictation_queue.depth() > 0:
+        set_job_status("⚙️ Transcribing...", Theme.BG_ELEVATED, Theme.INFO, Theme.INFO)
+    else:
+        set_job_status("🎤 Ready", Theme.BG_ELEVATED, Theme.TEXT_PRIMARY, Theme.PINK_PRIMARY)
+
+
 def notify(msg):
     if NOTIFY:
         try:
@@ -1434,9 +1610,27 @@ def device_index_and_names():
     return idxs, labels
 
 
+def _native_input_format(idx):
+    """(samplerate, channels) to open device idx with.
+
+    Prefer the device's own rate and channel count, so the driver does no
+    resampling; capture converts to SAMPLE_RATE mono itself. Falls back to
+    SAMPLE_RATE mono, and raises if the device supports neither.
+    """
+    try:
+        dev = sd.query_devices(idx)
+        rate = int(dev.get("default_samplerate") or SAMPLE_RATE)
+        channels = max(1, min(int(dev.get("max_input_channels", 1)), MAX_CAPTURE_CHANNELS))
+        sd.check_input_settings(device=idx, samplerate=rate, channels=channels, dtype="int16")
+        return rate, channels
+    except Exception:
+        sd.check_input_settings(device=idx, samplerate=SAMPLE_RATE, channels=CHANNELS, dtype="int16")
+        return SAMPLE_RATE, CHANNELS
+
+
 def resolve_input_device():
     """Resolve the input device index and validate settings. Sets globals."""
-    global selected_input_device_idx, selected_input_device_name
+    global selected_input_device_idx, selected_input_device_name, selected_input_format
     devices = list_input_devices()
     if not devices:
         notify("No input-capable audio devices found.")
@@ -1479,27 +1673,32 @@ def resolve_input_device():
                     except Exception:
                         idx, name = devices[0]
 
-        sd.check_input_settings(device=idx, samplerate=SAMPLE_RATE, channels=CHANNELS)
+        selected_input_format = _native_input_format(idx)
         selected_input_device_idx = idx
         selected_input_device_name = name
         notify(f"Mic: {name}")
+        log_line(f"Mic format: {selected_input_format[0]} Hz x{selected_input_format[1]}")
     except Exception as e:
         notify(f"Mic selection error: {e}")
         selected_input_device_idx = None
         selected_input_device_name = None
 
 
+def find_whisper_bin():
+    """First existing entry of WHISPER_CANDIDATES, or None."""
+    for candidate in WHISPER_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
 def startup_diagnostics():
     """Run preflight checks and print a concise summary."""
     issues = []
     if not os.path.exists(MODEL_PATH):
         issues.append(f"Missing model at {MODEL_PATH}")
     global resolved_whisper_bin
-    resolved_whisper_bin = None
-    for candidate in WHISPER_CANDIDATES:
-        if os.path.exists(candidate):
-            resolved_whisper_bin = candidate
-            break
+    resolved_whisper_bin = find_whisper_bin()
     if resolved_whisper_bin is None:
         issues.append("Missing whisper binary (checked multiple locations)")
     else:
@@ -1515,10 +1714,11 @@ def startup_diagnostics():
     if selected_input_device_idx is None:
         issues.append("No working input device")
     else:
+        rate, channels = selected_input_format
         try:
-            sd.check_input_settings(device=selected_input_device_idx, samplerate=SAMPLE_RATE, channels=CHANNELS)
+            sd.check_input_settings(device=selected_input_device_idx, samplerate=rate, channels=channels, dtype="int16")
         except Exception as e:
-            issues.append(f"Device unsupported @ {SAMPLE_RATE} Hz / {CHANNELS}ch: {e}")
+            issues.append(f"Device unsupported @ {rate} Hz / {channels}ch: {e}")
 
     if issues:
         set_status_safe("⚠️ Issues detected", Theme.WARNING, Theme.BG_DARK, Theme.WARNING)
@@ -1554,8 +1754,11 @@ def _resolve_whisper_exe(bin_path: str) -> str:
             return os.path.abspath(exe_name)
     raise FileNotFoundError("Whisper binary not found (env, PATH, or known locations).")
 
-def build_whisper_cmd(exe, model_path, wav_path, base_args=None):
-    base_args = base_args or []
+def build_whisper_cmd(exe, model_path, wav_path, base_args=None, tuned=None):
+    """Command line for whisper-cli/main.exe; tuned="gpu"/"cpu" appends the hw_profile threading args."""
+    base_args = list(base_args or [])
+    if tuned:
+        base_args += hw_profile.cli_args(model_path, tuned)
     extra_args = shlex.split(os.getenv("FLOW_WHISPER_ARGS", ""))
 
     if os.path.basename(exe).lower() == "whisper-cli.exe":
@@ -1578,72 +1781,569 @@ MIN_SEC = 0.3
 RMS_THRESH = 0.002
 PREROLL_SEC = 2.0
 POSTROLL_SEC = 0.4
+PREROLL = os.environ.get("FLOW_PREROLL", "") == "1"   # keep the mic open and prepend the last PREROLL_SEC
+PREROLL_KEEP_SEC = 0.25   # lead-in kept before the first voiced frame of the pre-roll
+MAX_CAPTURE_CHANNELS = 8  # mic arrays are opened with up to this many channels and downmixed
+SPILL_AFTER_SEC = float(os.environ.get("FLOW_SPILL_AFTER_SEC", "120"))  # longer recordings stream to disk; 0 disables
+SPILL_TAIL_SEC = 5.0      # newest audio held in RAM between writes to the spill file
+SPILL_DIR = os.path.join(_script_dir, "capture_spill")
+PAUSE_COMPRESS = os.environ.get("FLOW_PAUSE_COMPRESS", "") == "1"   # shorten long pauses before decoding
+PAUSE_MAX_SEC = 0.8       # silent runs longer than this are cut down...
+PAUSE_KEEP_SEC = 0.3      # ...to this gap, half kept on each side of the cut
+PAUSE_SPEECH_DB = 20      # silence must be at least this far below the recording's speech level
+
+class CaptureBuffer:
+    """Growable int16 buffer filled from the PortAudio callback.
+
+    Capacity doubles when full, so a write is one slice copy with no
+    per-block list entry, and view() hands the recording over without a
+    copy. Voiced time is counted per 20 ms frame with one vectorized energy
+    computation over each block.
+    """
+
+    def __init__(self, initial_sec=60.0):
+        self.buf = np.empty(int(initial_sec * SAMPLE_RATE), dtype=np.int16)
+        self.n = 0
+        self.voiced = 0   # samples in frames above RMS_THRESH
+        self.frame = int(0.02 * SAMPLE_RATE)
+        self.carry = np.zeros(0, dtype=np.int16)   # tail of the last block short of a whole frame
+        self.energy_thresh = (RMS_THRESH * 32768.0) ** 2 * self.frame
+
+    def write(self, samples):
+        """Append int16 samples; returns the written region as a view."""
+        k = len(samples)
+        if self.n + k > len(self.buf):
+            grown = np.empty(max(2 * len(self.buf), self.n + k), dtype=np.int16)
+            grown[:self.n] = self.buf[:self.n]
+            self.buf = grown
+        self.buf[self.n:self.n + k] = samples
+        self._count_voiced(samples)
+        self.n += k
+        return self.buf[self.n - k:self.n]
+
+    def _count_voiced(self, samples):
+        # blocks need not be whole frames (50 ms pre-roll blocks, resampled
+        # blocks), so the remainder is counted with the next block
+        if len(self.carry):
+            samples = np.concatenate((self.carry, samples))
+        whole = len(samples) - len(samples) % self.frame
+        self.carry = samples[whole:].copy()
+        if whole:
+            frames = samples[:whole].astype(np.float32).reshape(-1, self.frame)
+            energy = np.einsum("ij,ij->i", frames, frames)
+            self.voiced += int(np.count_nonzero(energy > self.energy_thresh)) * self.frame
+
+    def view(self):
+        return self.buf[:self.n]
+
+    def finish(self):
+        """The recording as handed to transcription, once capture has stopped."""
+        return self.view()
+
+
+def is_spill_file(path):
+    return isinstance(path, str) and os.path.dirname(os.path.abspath(path)) == os.path.abspath(SPILL_DIR)
+
+
+def remove_spill_file(path, after=None):
+    """Delete a spill recording, once the thread after (its refinement) has finished."""
+    if not is_spill_file(path):
+        return
+    if after is not None and after.is_alive():
+        threading.Thread(target=lambda: (after.join(), remove_spill_file(path)), daemon=True).start()
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log_line(f"[rec] spill cleanup error: {e}")
+
+
+def clear_spill_files():
+    """Remove recordings left behind by a previous run that did not finish its queue."""
+    for old in glob.glob(os.path.join(SPILL_DIR, "capture_*.wav")):
+        remove_spill_file(old)
+
+
+class SpillingCapture(CaptureBuffer):
+    """CaptureBuffer that moves a recording to a WAV file once it passes spill_after_sec.
+
+    Until then it is the ordinary in-memory buffer. At the threshold the
+    samples so far go to a writer thread, and from then on only the newest
+    tail_sec stay in RAM: each time that tail fills it is handed to the
+    writer whole, so the PortAudio callback never touches the disk and memory
+    stays flat however long the key is held. finish() returns the completed
+    file's path, which run_whisper() decodes in blocks straight from disk.
+    """
+
+    def __init__(self, spill_after_sec=SPILL_AFTER_SEC, tail_sec=SPILL_TAIL_SEC):
+        super().__init__(initial_sec=min(60.0, spill_after_sec))
+        self.spill_after = int(spill_after_sec * SAMPLE_RATE)
+        self.tail = int(tail_sec * SAMPLE_RATE)
+        self.path = None
+        self.pending = None   # queue of int16 arrays for the writer, None ends it
+        self.writer = None
+        self.spilled = 0      # samples handed to the writer
+        self.error = None
+
+    def write(self, samples):
+        k = len(samples)
+        if self.path is None:
+            if self.n + k <= self.spill_after:
+                return super().write(samples)
+            self._start_spill()
+        fill = self.n - self.spilled
+        if fill + k > len(self.buf):
+            self._hand_over(fill, k)
+            fill = 0
+        self.buf[fill:fill + k] = samples
+        self._count_voiced(samples)
+        self.n += k
+        return self.buf[fill:fill + k]
+
+    def _hand_over(self, fill, need=0):
+        # the filled buffer is never written again, so it is queued without a copy
+        if fill:
+            self.pending.put(self.buf[:fill])
+        self.spilled += fill
+        self.buf = np.empty(max(self.tail, need), dtype=np.int16)
+
+    def _start_spill(self):
+        self.path = os.path.join(SPILL_DIR, f"capture_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{id(self):x}.wav")
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+        self._hand_over(self.n)
+
+    def _write_loop(self):
+        try:
+            os.makedirs(SPILL_DIR, exist_ok=True)
+            with sf.SoundFile(self.path, "w", samplerate=SAMPLE_RATE, channels=1, subtype="PCM_16") as f:
+                while True:
+                    block = self.pending.get()
+                    if block is None:
+                        return
+                    f.write(block)
+        except Exception as e:
+            self.error = e
+            log_line(f"[rec] spill write error: {e}")
+
+    def finish(self):
+        """The sample array for a short recording, the spill file's path for a long one (None if writing failed)."""
+        if self.path is None:
+            return self.view()
+        self._hand_over(self.n - self.spilled)
+        self.pending.put(None)
+        self.writer.join()
+        if self.error is not None:
+            return None
+        log_line(f"[rec] spilled {self.n / SAMPLE_RATE:.1f}s to {self.path}")
+        return self.path
+
+
+class CaptureConverter:
+    """Turn int16 blocks in the device's format into SAMPLE_RATE mono int16.
+
+    Channels are averaged and the rate converted with a streaming Resampler,
+    both as whole-block NumPy operations; at SAMPLE_RATE mono the block is
+    passed through untouched.
+    """
+
+    def __init__(self, rate, channels):
+        self.channels = channels
+        self.resampler = Resampler(rate) if rate != SAMPLE_RATE else None
+
+    def process(self, indata):
+        if self.resampler is None and self.channels == 1:
+            return indata[:, 0]
+        mono = indata.mean(axis=1, dtype=np.float32) if self.channels > 1 else indata[:, 0].astype(np.float32)
+        if self.resampler is not None:
+            mono = self.resampler.process(mono)
+        return np.clip(mono, -32768, 32767, out=mono).astype(np.int16)
+
+
+def bench_capture_converter(block_sec=0.05, seconds=10.0):
+    """Print the per-block cost of CaptureConverter for common device formats."""
+    for rate, channels in ((44100, 1), (48000, 1), (48000, 2), (48000, 4), (96000, 2)):
+        conv = CaptureConverter(rate, channels)
+        block = (np.random.randn(int(rate * block_sec), channels) * 3000).astype(np.int16)
+        n = int(seconds / block_sec)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            conv.process(block)
+        per_block = (time.perf_counter() - t0) / n
+        print(f"{rate} Hz x{channels}: {per_block * 1e6:.0f} us per {block_sec * 1000:.0f} ms block "
+              f"({per_block / block_sec * 100:.2f}% of real time)")
+
+
+class LevelMeter:
+    """Latest input level, published by whichever capture stream is running.
+
+    Each block replaces a single (rms, peak, time) tuple, an atomic attribute
+    store, so readers such as the settings test and the pill take no lock
+    and never open the device themselves.
+    """
+
+    STALE_SEC = 0.5
+
+    def __init__(self):
+        self.latest = (0.0, 0.0, 0.0)
+
+    def publish(self, block):
+        if not len(block):
+            return
+        x = block.astype(np.float32)
+        rms = float(np.sqrt(np.dot(x, x) / len(x))) / 32768.0
+        peak = float(np.abs(x).max()) / 32768.0
+        self.latest = (rms, peak, time.time())
+
+    def read(self):
+        """(rms, peak) in full-scale units, or None when nothing is publishing."""
+        rms, peak, ts = self.latest
+        if time.time() - ts > self.STALE_SEC:
+            return None
+        return rms, peak
+
+    def level(self):
+        """RMS mapped from -60..0 dBFS to 0..1, or None when nothing is publishing."""
+        reading = self.read()
+        if reading is None:
+            return None
+        db = 20 * math.log10(max(reading[0], 1e-6))
+        return min(1.0, max(0.0, (db + 60) / 60))
+
+
+level_meter = LevelMeter()
+
+
+@contextlib.contextmanager
+def metering_stream():
+    """Keep a capture stream publishing to level_meter for the duration of the block.
+
+    Reuses the recording or pre-roll stream when one is running; otherwise
+    opens the device once.
+    """
+    live = live_input
+    if recording_flag.is_set() or (live is not None and live.active()):
+        yield
+        return
+    rate, channels = selected_input_format
+    converter = CaptureConverter(rate, channels)
+
+    def _callback(indata, frames, time_info, status):
+        level_meter.publish(converter.process(indata))
+
+    with sd.InputStream(samplerate=rate, channels=channels, dtype="int16", blocksize=int(rate * 0.05),
+                        device=selected_input_device_idx, callback=_callback):
+        yield
+
+
+class PrerollRing:
+    """Fixed-size circular int16 buffer holding the most recent audio."""
+
+    def __init__(self, seconds):
+        self.buf = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+        self.pos = 0
+        self.filled = 0
+
+    def write(self, samples):
+        n, k = len(self.buf), len(samples)
+        if k >= n:
+            self.buf[:] = samples[k - n:]
+            self.pos, self.filled = 0, n
+            return
+        end = self.pos + k
+        if end <= n:
+            self.buf[self.pos:end] = samples
+        else:
+            first = n - self.pos
+            self.buf[self.pos:] = samples[:first]
+            self.buf[:k - first] = samples[first:]
+        self.pos = end % n
+        self.filled = min(n, self.filled + k)
+
+    def snapshot(self):
+        """Buffered audio, oldest first."""
+        if self.filled < len(self.buf):
+            return self.buf[:self.pos].copy()
+        return np.concatenate([self.buf[self.pos:], self.buf[:self.pos]])
+
+    def clear(self):
+        self.pos = self.filled = 0
+
+
+def _trim_leading_silence(samples, keep_sec=PREROLL_KEEP_SEC):
+    """Drop pre-roll audio before the first voiced 20 ms frame, keeping keep_sec of lead-in."""
+    frame = int(0.02 * SAMPLE_RATE)
+    keep = int(keep_sec * SAMPLE_RATE)
+    whole = len(samples) - len(samples) % frame
+    if not whole:
+        return samples[-keep:] if keep else samples[:0]
+    frames = samples[len(samples) - whole:].astype(np.float32).reshape(-1, frame)
+    voiced = np.flatnonzero(np.einsum("ij,ij->i", frames, frames) > (RMS_THRESH * 32768.0) ** 2 * frame)
+    if not len(voiced):
+        return samples[-keep:] if keep else samples[:0]
+    start = len(samples) - whole + int(voiced[0]) * frame
+    return samples[max(0, start - keep):]
+
+
+class PauseMap:
+    """Where compress_pauses() cut, for mapping decoded times back to the recording.
+
+    Dictation decodes without timestamps, so nothing maps times yet; the map
+    rides on the TranscriptionJob for timestamped output.
+    """
+
+    def __init__(self, orig_starts, comp_starts, removed):
+        self.orig_starts = orig_starts   # sample offset of each kept span in the recording
+        self.comp_starts = comp_starts   # and in the compressed audio
+        self.removed = removed           # samples cut in total
+
+    def original_time(self, t_sec):
+        """Seconds in the compressed audio (scalar or array) -> seconds in the recording."""
+        pos = np.asarray(t_sec, dtype=np.float64) * SAMPLE_RATE
+        i = np.maximum(np.searchsorted(self.comp_starts, pos, side="right") - 1, 0)
+        return (self.orig_starts[i] + pos - self.comp_starts[i]) / SAMPLE_RATE
+
+
+def compress_pauses(samples, max_sec=PAUSE_MAX_SEC, keep_sec=PAUSE_KEEP_SEC):
+    """Shorten every silent run longer than max_sec to keep_sec.
+
+    Silence is a 20 ms frame below twice the recording's noise floor (its
+    10th-percentile frame RMS, at least RMS_THRESH) and also PAUSE_SPEECH_DB
+    below its speech level (90th percentile), so a quiet microphone's speech
+    is never taken for a pause. Runs are found and removed with whole-array
+    operations. Returns (samples, PauseMap), or (samples, None) when there
+    was nothing to cut.
+    """
+    frame = int(0.02 * SAMPLE_RATE)
+    n_frames = len(samples) // frame
+    if not n_frames:
+        return samples, None
+    frames = samples[:n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame) / 32768.0
+    floor, speech = np.percentile(rms, [10, 90])
+    thresh = min(max(RMS_THRESH, 2 * float(floor)), float(speech) * 10 ** (-PAUSE_SPEECH_DB / 20))
+    edges = np.diff(np.concatenate(([0], (rms < thresh).astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    long = (ends - starts) * frame > max_sec * SAMPLE_RATE
+    if not long.any():
+        return samples, None
+    keep = int(keep_sec / 0.02)
+    cut_lo = (starts[long] + keep // 2) * frame
+    cut_hi = (ends[long] - (keep - keep // 2)) * frame
+    # +1/-1 at span edges; the running sum is 0 outside every cut
+    delta = np.zeros(len(samples) + 1, dtype=np.int8)
+    delta[cut_lo] = -1
+    delta[cut_hi] = 1
+    out = samples[np.cumsum(delta[:-1], dtype=np.int8) == 0]
+    orig_starts = np.concatenate(([0], cut_hi))
+    lengths = np.concatenate((cut_lo, [len(samples)])) - orig_starts
+    comp_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return out, PauseMap(orig_starts, comp_starts, len(samples) - len(out))
+
+
+class LiveInput:
+    """Always-open capture stream for FLOW_PREROLL=1.
+
+    While idle the callback keeps the last PREROLL_SEC in a PrerollRing. A
+    recording attaches its CaptureBuffer: the ring, trimmed of leading
+    silence, is written first and live blocks follow, so the utterance
+    includes the moment before the key press and no device-open delay.
+    """
+
+    def __init__(self, device, fmt):
+        self.device = device
+        self.converter = CaptureConverter(*fmt)
+        self.ring = PrerollRing(PREROLL_SEC)
+        self.lock = threading.Lock()
+        self.capture = None
+        self.stream_job = None
+        self.stream = sd.InputStream(samplerate=fmt[0], channels=fmt[1], dtype="int16",
+                                     blocksize=int(fmt[0] * 0.05), device=device, callback=self._callback)
+        self.stream.start()
+
+    def _callback(self, indata, frames, time_info, status):
+        block = self.converter.process(indata)
+        level_meter.publish(block)
+        with self.lock:
+            if self.capture is None:
+                self.ring.write(block)
+                return
+            view = self.capture.write(block)
+            if self.stream_job is not None:
+                self.stream_job.feed(view)
+
+    def active(self):
+        return self.stream.active
+
+    def attach(self, capture, stream_job=None):
+        """Start feeding capture, seeded with the trimmed pre-roll. Returns the pre-roll length in samples."""
+        with self.lock:
+            pre = _trim_leading_silence(self.ring.snapshot())
+            self.ring.clear()
+            if len(pre):
+                view = capture.write(pre)
+                if stream_job is not None:
+                    stream_job.feed(view)
+            self.capture = capture
+            self.stream_job = stream_job
+        return len(pre)
+
+    def detach(self):
+        with self.lock:
+            self.capture = None
+            self.stream_job = None
+
+    def close(self):
+        try:
+            self.stream.close()
+        except Exception:
+            pass
+
+
+live_input = None   # LiveInput when PREROLL is on, opened in main()
+
+
+def open_live_input():
+    """(Re)open the pre-roll stream on the selected device; closes the previous one."""
+    global live_input
+    if live_input is not None:
+        live_input.close()
+        live_input = None
+    if PREROLL and selected_input_device_idx is not None:
+        try:
+            live_input = LiveInput(selected_input_device_idx, selected_input_format)
+        except Exception as e:
+            log_line(f"PREROLL: cannot keep input open: {e}")
+
 
 def record_loop():
-    """Record while recording_flag is set; write to WAV on stop with RMS gate."""
+    """Record while recording_flag is set; hand audio over in captured_audio with RMS gate.
+
+    PortAudio calls back with int16 blocks that go straight into a
+    CaptureBuffer, so no block is dropped while Python is busy elsewhere.
+    """
+    global captured_audio
     log_line("[rec] start")
     notify("🎙️ Listening...")
-    data = []
-    voiced_samples = 0
-    block_dur = 0.1
+    stream_job = active_stream
+    capture = SpillingCapture() if SPILL_AFTER_SEC > 0 else CaptureBuffer()
+    overflows = 0
 
     if selected_input_device_idx is None:
         set_status_safe("❌ Mic not ready", Theme.ERROR, Theme.TEXT_PRIMARY, Theme.ERROR)
         return
 
-    try:
-        with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype="float32", device=selected_input_device_idx) as stream:
+    rate, channels = selected_input_format
+    converter = CaptureConverter(rate, channels)
+
+    def _callback(indata, frames, time_info, status):
+        nonlocal overflows
+        if status.input_overflow:
+            overflows += 1
+        block = capture.write(converter.process(indata))
+        level_meter.publish(block)
+        if stream_job is not None:
+            stream_job.feed(block)
+
+    live = live_input
+    if live is not None and live.device == selected_input_device_idx and live.active():
+        pre = live.attach(capture, stream_job)
+        log_line(f"[rec] pre-roll {pre / SAMPLE_RATE:.2f}s")
+        try:
             while recording_flag.is_set():
-                try:
-                    block, _ = stream.read(int(SAMPLE_RATE * block_dur))
-                except Exception as e:
-                    log_line(f"Audio read error: {e}")
-                    set_status_safe("Audio read error", Theme.ERROR)
-                    break
-                data.append(block.copy())
-                rms = float(np.sqrt(np.mean(block * block) + 1e-12))
-                if rms > RMS_THRESH:
-                    voiced_samples += block.shape[0]
-    except Exception as e:
-        log_line(f"Mic open error: {e}")
-        set_status_safe("Mic open error", Theme.ERROR)
+                time.sleep(0.01)
+        finally:
+            live.detach()
+    else:
+        try:
+            with sd.InputStream(samplerate=rate, channels=channels, dtype="int16", blocksize=int(rate * 0.1),
+                                device=selected_input_device_idx, callback=_callback):
+                while recording_flag.is_set():
+                    time.sleep(0.01)
+        except Exception as e:
+            log_line(f"Mic open error: {e}")
+            set_status_safe("Mic open error", Theme.ERROR)
+            return
+    if overflows:
+        log_line(f"[rec] {overflows} input overflow(s)")
+
+    audio = capture.finish()
+    if audio is None:
+        set_status_safe("❌ Recording not saved", Theme.ERROR, Theme.TEXT_PRIMARY, Theme.ERROR)
         return
 
-    if not data or (voiced_samples / SAMPLE_RATE) < MIN_SEC:
+    if not capture.n or (capture.voiced / SAMPLE_RATE) < MIN_SEC:
+        remove_spill_file(audio)
         safe_print("[rec] stop, no speech detected")
-        try:
-            if os.path.exists(WAV_TMP):
-                os.remove(WAV_TMP)
-        except Exception:
-            pass
         set_status_safe("🔇 No speech detected", Theme.WARNING, Theme.BG_DARK, Theme.WARNING)
         return
 
-    try:
-        audio = np.concatenate(data, axis=0)
-        sf.write(WAV_TMP, audio, SAMPLE_RATE)
-        safe_print(f"[rec] stop, saved: {WAV_TMP}")
-    except Exception as e:
-        log_line(f"WAV write error: {e}")
-        set_status_safe("WAV write error", Theme.ERROR)
+    captured_audio = audio
+    safe_print(f"[rec] stop, captured {capture.n / SAMPLE_RATE:.1f}s")
 
 
 def start_recording():
-    global rec_thread
+    global rec_thread, captured_audio, active_stream
     with STATE_LOCK:
-        if recording_flag.is_set() or transcribing_flag.is_set():
+        if recording_flag.is_set() or stop_pending.is_set():
             return
-        try:
-            if os.path.exists(WAV_TMP):
-                os.remove(WAV_TMP)
-        except Exception:
-            pass
+        dictation_queue.preempt_stale()
+        if not dictation_queue.has_room():
+            notify(f"⏳ {JOB_BACKLOG_MAX} recordings still transcribing - wait a moment")
+            return
+        captured_audio = None
+        active_stream = StreamingTranscriber(resolved_whisper_bin or WHISPER_BIN) if STREAMING else None
         recording_flag.set()
     set_status_safe("🎙️ Listening...", Theme.PINK_DARK, Theme.TEXT_PRIMARY, Theme.PINK_PRIMARY)
     rec_thread = threading.Thread(target=record_loop, daemon=True)
     rec_thread.start()
-
-def _select_whisper_params(duration_sec):
+    if PRELAUNCH:
+        threading.Thread(target=prelaunch_engine, daemon=True).start()
+
+_inflight_lock = threading.Lock()
+_inflight = 0   # run_whisper() calls in progress, the router's measure of load
+
+def route_model(duration_sec):
+    """Pick a model file for an utterance from its duration, load and ACCURACY_PREF.
+
+    Short command-like utterances go to base.en and long prose to large-v3.
+    When other transcriptions are in flight or the GPU breaker is open the
+    choice steps down one tier. Models missing from disk are skipped in
+    favour of the nearest available tier.
+    """
+    short_max, mid_max = ROUTE_THRESHOLDS.get(ACCURACY_PREF, ROUTE_THRESHOLDS["balanced"])
+    d = duration_sec or 0.0
+    tier = 0 if d < short_max else 1 if d < mid_max else 2
+    with _inflight_lock:
+        busy = _inflight > 1
+    if tier > 0 and (busy or gpu_breaker.is_open()):
+        tier -= 1
+    paths = [res_path(os.path.join("models", name)) for name in MODEL_TIERS]
+    paths[-1] = MODEL_PATH
+    for t in sorted(range(len(paths)), key=lambda t: (abs(t - tier), -t)):
+        if os.path.exists(paths[t]):
+            return paths[t]
+    return MODEL_PATH
+
+
+def _select_whisper_params(duration_sec, backend="gpu", model_path=None):
+    """Pick (beam_size, best_of, mode) for an utterance.
+
+    With a latency budget (FLOW_LATENCY_BUDGET) and enough measured runs the
+    learned cost model decides; otherwise the hand-tuned duration table does.
+    """
+    # lib decodes with the library's beam width, so there is nothing to learn for it
+    learned = None if backend == LibWhisperBackend.name else param_tuner.choose(duration_sec, backend, _model_label(backend, model_path))
+    if learned is not None:
+        return learned
+    return _static_whisper_params(duration_sec)
+
+
+def _static_whisper_params(duration_sec):
     if duration_sec is None or duration_sec < 10:
         return 5, None, "fast"
     elif duration_sec < 25:
@@ -1656,6 +2356,428 @@ def _select_whisper_params(duration_sec):
         return 2, None, "minimal GPU/long audio"
 
 
+_fingerprint = None
+
+def machine_fingerprint():
+    """Identify CPU, GPU and whisper binary, so tuning is re-learned when any changes."""
+    global _fingerprint
+    if _fingerprint is None:
+        gpu = "none"
+        try:
+            res = subprocess.run(
+                ["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"],
+                capture_output=True, text=True, timeout=5,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+            if res.returncode == 0 and res.stdout.strip():
+                gpu = res.stdout.strip().splitlines()[0].strip()
+        except Exception:
+            pass
+        exe = resolved_whisper_bin or WHISPER_BIN
+        try:
+            exe_id = f"{os.path.basename(exe)}:{os.path.getsize(exe)}"
+        except Exception:
+            exe_id = os.path.basename(exe or "")
+        cpu = platform.processor() or platform.machine()
+        _fingerprint = f"{cpu}|{os.cpu_count()}|{gpu}|{exe_id}"
+    return _fingerprint
+
+
+_topology = None
+
+def cpu_topology():
+    """Physical cores as [(numa_node, group, core_index, [cpu set ids])], sorted; [] if unknown.
+
+    Read from GetSystemCpuSetInformation (Windows 10+), which also gives the
+    CPU set ids used to pin processes across processor groups.
+    """
+    global _topology
+    if _topology is None:
+        _topology = []
+        try:
+            kernel32 = ctypes.windll.kernel32
+            length = ctypes.c_ulong(0)
+            kernel32.GetSystemCpuSetInformation(None, 0, ctypes.byref(length), None, 0)
+            buf = (ctypes.c_byte * length.value)()
+            if kernel32.GetSystemCpuSetInformation(buf, length, ctypes.byref(length), None, 0):
+                cores = {}
+                offset = 0
+                while offset < length.value:
+                    size = ctypes.c_uint32.from_buffer(buf, offset).value
+                    if ctypes.c_uint32.from_buffer(buf, offset + 4).value == 0:  # CpuSetInformation
+                        cpu_id = ctypes.c_uint32.from_buffer(buf, offset + 8).value
+                        group = ctypes.c_uint16.from_buffer(buf, offset + 12).value
+                        core = ctypes.c_uint8.from_buffer(buf, offset + 15).value
+                        node = ctypes.c_uint8.from_buffer(buf, offset + 17).value
+                        cores.setdefault((node, group, core), []).append(cpu_id)
+                    offset += size or 32
+                _topology = [(n, g, c, ids) for (n, g, c), ids in sorted(cores.items())]
+        except Exception:
+            pass
+    return _topology
+
+
+def physical_core_count():
+    """Physical CPU cores, not SMT threads; falls back to os.cpu_count()."""
+    return len(cpu_topology()) or os.cpu_count() or 4
+
+
+class HardwareProfile:
+    """Fastest whisper-cli threading settings found by autotune() (HW_PROFILE_FILE).
+
+    Entries are keyed by machine_fingerprint(), model file and device
+    ("gpu"/"cpu"), so a new CPU, GPU, binary or model falls back to the
+    defaults - one thread per physical core, flash attention off - until
+    autotune is run again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except Exception:
+            pass
+        return {}
+
+    def _save(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2)
+        except Exception as e:
+            print(f"Hardware profile save error: {e}")
+
+    def _key(self, model_path, device):
+        return f"{machine_fingerprint()}|{os.path.basename(model_path or MODEL_PATH)}|{device}"
+
+    def get(self, model_path=None, device="gpu"):
+        with self.lock:
+            entry = self.data.get(self._key(model_path, device)) or {}
+        return {"threads": physical_core_count(), "flash_attn": False, "processors": 1, **entry}
+
+    def set(self, model_path, device, settings):
+        with self.lock:
+            self.data[self._key(model_path, device)] = settings
+            self._save()
+
+    def cli_args(self, model_path=None, device="gpu"):
+        s = self.get(model_path, device)
+        worker = current_core_worker()
+        if worker is not None:
+            s["threads"] = len(worker.cpu_set_ids)
+        args = ["-t", str(s["threads"]), "-fa" if s["flash_attn"] else "-nfa"]
+        if s["processors"] > 1:
+            args += ["-p", str(s["processors"])]
+        return args
+
+
+hw_profile = HardwareProfile(HW_PROFILE_FILE)
+
+
+# --- Core-pinned worker pool ---
+class CoreWorker:
+    """A slot for one whisper-cli process, pinned to a fixed set of physical cores.
+
+    Only the first logical processor of each core is used, and whisper-cli
+    gets one thread per core, so SMT siblings are not oversubscribed.
+    """
+
+    def __init__(self, index, cores):
+        self.index = index
+        self.nodes = sorted({node for node, _g, _c, _ids in cores})
+        self.cpu_set_ids = [ids[0] for _n, _g, _c, ids in cores]
+        self.load = 0
+
+    def pin(self, proc):
+        try:
+            ids = (ctypes.c_ulong * len(self.cpu_set_ids))(*self.cpu_set_ids)
+            if not ctypes.windll.kernel32.SetProcessDefaultCpuSets(ctypes.c_void_p(int(proc._handle)), ids, len(ids)):
+                log_line(f"PIN: worker {self.index} SetProcessDefaultCpuSets failed")
+        except Exception as e:
+            log_line(f"PIN: worker {self.index}: {e}")
+
+
+_core_local = threading.local()
+
+def current_core_worker():
+    return getattr(_core_local, "worker", None)
+
+
+@contextlib.contextmanager
+def core_scope(worker):
+    """Make worker the current CoreWorker of this thread for the duration of the block."""
+    prev = current_core_worker()
+    _core_local.worker = worker
+    try:
+        yield worker
+    finally:
+        _core_local.worker = prev
+
+
+def chunk_workers():
+    """Parallel chunk decodes for this thread: one inside a pinned CoreWorker, whose cores are all its process gets."""
+    return 1 if current_core_worker() is not None else max(1, CHUNK_WORKERS)
+
+
+class CorePool:
+    """Runs calls on N CoreWorkers, each owning a contiguous block of physical cores.
+
+    Cores are ordered by NUMA node, so with one worker per node or a multiple
+    of it no worker straddles two nodes. run() hands each call to the
+    least-loaded worker; whisper-cli processes started inside it are pinned
+    to that worker's cores and sized to its thread count.
+    """
+
+    def __init__(self, workers):
+        cores = cpu_topology()
+        n = max(1, min(workers, len(cores)))
+        per, extra = divmod(len(cores), n)
+        self.workers = []
+        start = 0
+        for i in range(n if cores else 0):
+            size = per + (i < extra)
+            self.workers.append(CoreWorker(i, cores[start:start + size]))
+            start += size
+        self.lock = threading.Lock()
+        for w in self.workers:
+            log_line(f"PIN: worker {w.index}: {len(w.cpu_set_ids)} cores on NUMA node(s) {w.nodes}")
+
+    def run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        with self.lock:
+            worker = min(self.workers, key=lambda w: (w.load, w.index))
+            worker.load += 1
+        try:
+            with core_scope(worker):
+                return fn(*args)
+        finally:
+            with self.lock:
+                worker.load -= 1
+
+
+def _file_id(path):
+    """Cheap identity of a binary or model file: name, size and mtime."""
+    try:
+        st = os.stat(path)
+        return f"{os.path.basename(path)}:{st.st_size}:{int(st.st_mtime)}"
+    except Exception:
+        return os.path.basename(path or "")
+
+
+def _hash_pcm(audio, h):
+    """Feed the samples of an array or audio file into hash h, a block at a time."""
+    if isinstance(audio, np.ndarray):
+        h.update(np.ascontiguousarray(audio, dtype=np.float32).data)
+        return
+    try:
+        with sf.SoundFile(audio) as f:
+            h.update(f"{f.samplerate}:{f.channels}".encode())
+            for block in f.blocks(blocksize=1 << 16, dtype="int16"):
+                h.update(np.ascontiguousarray(block).data)
+    except Exception:
+        # format soundfile cannot decode (whisper-cli may still): hash the bytes
+        with open(audio, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+
+
+class TranscriptCache:
+    """Decode results for audio files, content-addressed on disk (TRANSCRIPT_CACHE_DIR).
+
+    The key hashes the PCM samples together with the model file, whisper
+    binary, decoding parameters and the extra whisper args (FLOW_WHISPER_ARGS,
+    FLOW_SERVER_ARGS, the autotuned profile), so re-transcribing unchanged audio with
+    unchanged settings returns at once. One JSON file per key; a hit refreshes
+    its mtime and put() evicts the least recently used entries beyond
+    TRANSCRIPT_CACHE_MAX_MB. Live dictation, including recordings spilled to
+    disk, is not cached.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def key(self, audio, model_path, params, exe=None):
+        h = hashlib.sha256()
+        _hash_pcm(audio, h)
+        # user and autotuned whisper args (--prompt, -l, -fa, ...) change the transcript too
+        extra = [os.getenv("FLOW_WHISPER_ARGS", ""), os.getenv("FLOW_SERVER_ARGS", ""),
+                 hw_profile.get(model_path, "gpu"), hw_profile.get(model_path, "cpu")]
+        ident = [_file_id(model_path or MODEL_PATH), _file_id(exe or resolved_whisper_bin or WHISPER_BIN), params, extra]
+        h.update(json.dumps(ident, default=str).encode())
+        return h.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def get(self, key):
+        path = self._file(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except Exception:
+            return None
+
+    def put(self, key, value):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            tmp = self._file(key) + f".{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp, self._file(key))
+            self._evict()
+        except Exception as e:
+            log_line(f"Transcript cache write error: {e}")
+
+    def _evict(self):
+        with self.lock:
+            entries = []
+            for e in os.scandir(self.path):
+                if e.name.endswith(".json"):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+transcript_cache = TranscriptCache(TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
+
+
+def _model_label(backend, model_path=None):
+    return os.path.basename(CT2_MODEL if backend == "ct2" else (model_path or MODEL_PATH))
+
+
+class ParamTuner:
+    """Learns decoding cost on this machine and picks params for a latency budget.
+
+    Every transcription is appended to TIMINGS_FILE with its duration, params,
+    backend, model, machine fingerprint and wall time. For the current
+    (fingerprint, backend, model) a two-term model is fitted by least squares:
+
+        wall = overhead + per_sec * duration * (1 + BEAM_COST * (beam_size - 1))
+
+    choose() then walks PARAM_LADDER from most to least accurate and returns
+    the first entry predicted to finish within LATENCY_BUDGET_SEC. Records
+    from other hardware, binaries or models are ignored, so it re-tunes on
+    its own after a change.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = self._load()
+        self._fits = {}
+
+    def _load(self):
+        records = []
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for ln in f:
+                        try:
+                            records.append(json.loads(ln))
+                        except ValueError:
+                            continue
+        except Exception:
+            pass
+        return records[-TUNER_MAX_RECORDS:]
+
+    def record(self, duration_sec, beam_size, best_of, backend, wall_sec, model_path=None):
+        if not duration_sec:
+            return
+        rec = {
+            "ts": datetime.datetime.now().isoformat(timespec="seconds"),
+            "fp": machine_fingerprint(),
+            "backend": backend,
+            "model": _model_label(backend, model_path),
+            "duration": round(duration_sec, 3),
+            "bs": beam_size,
+            "bo": best_of,
+            "wall": round(wall_sec, 3),
+        }
+        with self.lock:
+            self.records.append(rec)
+            compact = len(self.records) > TUNER_MAX_RECORDS * 2
+            if compact:
+                self.records = self.records[-TUNER_MAX_RECORDS:]
+            self._fits.pop((rec["backend"], rec["model"]), None)
+            try:
+                if compact:
+                    with open(self.path, "w", encoding="utf-8") as f:
+                        f.writelines(json.dumps(r) + "\n" for r in self.records)
+                else:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(rec) + "\n")
+            except Exception as e:
+                print(f"Timings save error: {e}")
+
+    def _fit(self, backend, model):
+        """Return (overhead, per_sec) for this machine, or None without enough data."""
+        key = (backend, model)
+        with self.lock:
+            if key in self._fits:
+                return self._fits[key]
+            fp = machine_fingerprint()
+            rows = [r for r in self.records
+                    if r.get("fp") == fp and r.get("backend") == backend and r.get("model") == model]
+        fit = None
+        if len(rows) >= TUNER_MIN_RUNS:
+            x = np.array([r["duration"] * (1 + BEAM_COST * (r["bs"] - 1)) for r in rows], dtype=np.float64)
+            y = np.array([r["wall"] for r in rows], dtype=np.float64)
+            if np.ptp(x) > 1e-6:
+                A = np.stack([np.ones_like(x), x], axis=1)
+                (overhead, per_sec), *_ = np.linalg.lstsq(A, y, rcond=None)
+            else:
+                overhead, per_sec = 0.0, float(np.mean(y / np.maximum(x, 1e-6)))
+            fit = (max(float(overhead), 0.0), max(float(per_sec), 1e-6))
+            log_line(f"TUNER: {backend}/{model}: wall = {fit[0]:.2f}s + {fit[1]:.3f}s/s (n={len(rows)})")
+        with self.lock:
+            self._fits[key] = fit
+        return fit
+
+    def typical_duration(self):
+        with self.lock:
+            durs = sorted(r["duration"] for r in self.records[-200:])
+        return durs[len(durs) // 2] if durs else None
+
+    def choose(self, duration_sec, backend, model):
+        if LATENCY_BUDGET_SEC <= 0:
+            return None
+        if duration_sec is None:
+            duration_sec = self.typical_duration()
+            if duration_sec is None:
+                return None
+        fit = self._fit(backend, model)
+        if fit is None:
+            return None
+        overhead, per_sec = fit
+        for bs, bo in PARAM_LADDER:
+            pred = overhead + per_sec * duration_sec * (1 + BEAM_COST * (bs - 1))
+            if pred <= LATENCY_BUDGET_SEC:
+                return bs, bo, f"learned, ~{pred:.2f}s of {LATENCY_BUDGET_SEC:.1f}s budget"
+        bs, bo = PARAM_LADDER[-1]
+        return bs, bo, f"learned, over budget (~{pred:.2f}s)"
+
+
+param_tuner = ParamTuner(TIMINGS_FILE)
+
+
 def _parse_cuda_error(stderr_text):
     if not stderr_text:
         return None, None, None
@@ -1682,6 +2804,133 @@ def _parse_cuda_error(stderr_text):
     return None, None, None
 
 
+def _classify_cli_failure(res):
+    """Return None if a whisper-cli run succeeded, else its failure class.
+
+    CUDA classes come from _parse_cuda_error(); "BAD_ARGS" means the binary
+    rejected the command line and "EXIT" is any other non-zero exit.
+    """
+    err = res.stderr or ""
+    cuda_error_type, cuda_error_msg, cuda_snippet = _parse_cuda_error(err)
+    if cuda_error_type:
+        safe_print(f"[whisper] CUDA error ({cuda_error_type}): {cuda_error_msg}")
+        log_line(f"CUDA_ERROR type={cuda_error_type} msg={cuda_error_msg}")
+        if cuda_snippet:
+            log_line(f"CUDA_ERROR snippet: {cuda_snippet}")
+        return cuda_error_type
+    if "Incorrect KV cache padding" in err:
+        return "KV_CACHE"
+    if res.returncode != 0:
+        low = err.lower()
+        if "usage:" in low or "unknown argument" in low:
+            return "BAD_ARGS"
+        safe_print(f"[whisper] Process failed (exit code {res.returncode})")
+        log_line(f"PROCESS_ERROR exit_code={res.returncode}")
+        return "EXIT"
+    return None
+
+
+class GpuCircuitBreaker:
+    """Remembers GPU failures across runs and restarts (GPU_BREAKER_FILE).
+
+    After GPU_BREAKER_THRESHOLD consecutive utterances whose whole GPU ladder
+    failed, the breaker opens and the GPU attempt is skipped. Once the
+    cool-down has passed one utterance probes the GPU again: success closes
+    the breaker, failure reopens it with the cool-down doubled.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self):
+        default = {
+            "failures": 0,
+            "open_until": 0.0,
+            "cooldown_sec": GPU_BREAKER_COOLDOWN_SEC,
+            "last_error": None,
+        }
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+                    for key in default:
+                        if key not in loaded:
+                            loaded[key] = default[key]
+                    return loaded
+        except Exception:
+            pass
+        return default
+
+    def _save(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2)
+        except Exception as e:
+            print(f"Breaker save error: {e}")
+
+    def is_open(self):
+        with self.lock:
+            return time.time() < self.data["open_until"]
+
+    def recently_failed(self):
+        with self.lock:
+            return self.data["failures"] > 0
+
+    def allow(self):
+        """True if the GPU should be tried (closed, or cool-down over: probe)."""
+        return not self.is_open()
+
+    def record(self, ok, error_type=None):
+        with self.lock:
+            if ok:
+                if self.data["failures"] or self.data["open_until"]:
+                    log_line("GPU_BREAKER: GPU healthy again; closed")
+                    self.data.update(failures=0, open_until=0.0, cooldown_sec=GPU_BREAKER_COOLDOWN_SEC, last_error=None)
+                    self._save()
+                return
+            was_probe = self.data["open_until"] > 0
+            self.data["failures"] += 1
+            self.data["last_error"] = error_type
+            if self.data["failures"] >= GPU_BREAKER_THRESHOLD:
+                if was_probe:
+                    self.data["cooldown_sec"] = min(self.data["cooldown_sec"] * 2, GPU_BREAKER_MAX_COOLDOWN_SEC)
+                self.data["open_until"] = time.time() + self.data["cooldown_sec"]
+                log_line(f"GPU_BREAKER: open for {self.data['cooldown_sec'] / 60:.0f} min after "
+                         f"{self.data['failures']} failures (last: {error_type})")
+            self._save()
+
+
+gpu_breaker = GpuCircuitBreaker(GPU_BREAKER_FILE)
+
+
+class GpuLatency:
+    """Rolling GPU wall times per duration class, for the hedge deadline."""
+
+    def __init__(self, size=50):
+        self.size = size
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, mode, wall_sec):
+        with self.lock:
+            vals = self.samples.setdefault(mode, [])
+            vals.append(wall_sec)
+            del vals[:-self.size]
+
+    def p95(self, mode):
+        """95th percentile wall time, or None until HEDGE_MIN_SAMPLES runs are known."""
+        with self.lock:
+            vals = sorted(self.samples.get(mode, []))
+        if len(vals) < HEDGE_MIN_SAMPLES:
+            return None
+        return vals[min(len(vals) - 1, int(math.ceil(0.95 * len(vals))) - 1)]
+
+
+gpu_latency = GpuLatency()
+
+
 def _extract_error_snippet(text, keyword):
     try:
         lines = text.split('\n')
@@ -1695,140 +2944,1332 @@ def _extract_error_snippet(text, keyword):
     return text[:200]
 
 
-def run_whisper(filename, bin_path):
-    exe = os.path.abspath(_resolve_whisper_exe(bin_path))
-    workdir = os.path.dirname(exe) or "."
-
-    out_txt = os.path.join(tempfile.gettempdir(), f"flow_out_{uuid.uuid4().hex}.txt")
-
-    try:
-        if os.path.exists(out_txt):
-            os.remove(out_txt)
-    except Exception:
-        pass
-
-    global model_info_logged
-    if not model_info_logged:
-        safe_print(f"MODEL_PATH -> {MODEL_PATH}")
+# --- Resident engines ---
+class TranscriptionBackend:
+    """Transcription engine that stays loaded across utterances.
+
+    transcribe() takes mono float32 audio at SAMPLE_RATE and returns the text.
+    It raises on failure so run_whisper() can fall back to whisper-cli.
+    """
+
+    name = "base"
+    failed = False
+    tunable = True   # honours beam_size/best_of, so ParamTuner may learn from its timings
+
+    def start(self):
+        """Load the model ahead of the first utterance."""
+
+    def transcribe(self, samples, beam_size, best_of=None):
+        raise NotImplementedError
+
+    def applied_params(self, beam_size, best_of=None):
+        """(beam_size, best_of) that transcribe() really decodes with for these requested values."""
+        return beam_size, best_of
+
+    def close(self):
+        """Release the model and any child process."""
+
+
+def _wav_bytes(samples):
+    """Encode int16 or float32 samples as an in-memory 16-bit WAV."""
+    buf = io.BytesIO()
+    sf.write(buf, samples, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def _float_samples(samples):
+    """float32 samples in [-1, 1] from int16 capture or float32 audio."""
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    return np.asarray(samples, dtype=np.float32)
+
+
+class Resampler:
+    """Streaming polyphase FIR resampler for mono float32 blocks.
+
+    The rate ratio is reduced to up/down and a Kaiser-windowed sinc low-pass
+    just below the lower Nyquist is split into `up` phases. Each block is resampled
+    with one gather and row-wise dot product against the kept input history,
+    so any block size gives the same output as a single call on the whole
+    signal.
+    """
+
+    def __init__(self, rate_in, rate_out=SAMPLE_RATE, taps_per_phase=64):
+        g = math.gcd(int(rate_in), int(rate_out))
+        self.up = int(rate_out) // g
+        self.down = int(rate_in) // g
+        self.taps = taps_per_phase
+        n = taps_per_phase * self.up
+        cutoff = 0.45 / max(self.up, self.down)  # cycles per sample at the upsampled rate
+        t = np.arange(n) - (n - 1) / 2.0
+        h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n, 8.0)
+        h *= self.up / h.sum()
+        self.bank = h.reshape(taps_per_phase, self.up).T.astype(np.float32)  # phase p: h[p + k*up]
+        self.history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self.n_in = 0    # input samples consumed
+        self.n_out = 0   # output samples produced
+
+    def process(self, block):
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        if self.up == self.down:
+            return block
+        x = np.concatenate([self.history, block])
+        first = self.n_in - len(self.history)   # input index of x[0]
+        total = self.n_in + len(block)
+        end = (total * self.up - 1) // self.down + 1  # outputs whose newest input has arrived
+        pos = np.arange(self.n_out, end, dtype=np.int64) * self.down
+        base = pos // self.up - first
+        idx = base[:, None] - np.arange(self.taps)[None, :]
+        out = np.einsum("ij,ij->i", x[idx], self.bank[pos % self.up]).astype(np.float32)
+        self.history = x[len(x) - (self.taps - 1):]
+        self.n_in = total
+        self.n_out = end
+        return out
+
+    def flush(self):
+        """Output still held back by the filter delay."""
+        return self.process(np.zeros(self.taps // 2, dtype=np.float32))
+
+
+def iter_audio_16k(path, block_sec=10.0):
+    """Yield any soundfile-readable file as mono float32 blocks at SAMPLE_RATE.
+
+    Decoding, downmixing and resampling happen a block at a time, so memory
+    stays flat however long the file is.
+    """
+    with sf.SoundFile(path) as f:
+        rs = Resampler(f.samplerate) if f.samplerate != SAMPLE_RATE else None
+        for block in f.blocks(blocksize=int(block_sec * f.samplerate), dtype="float32", always_2d=True):
+            mono = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+            yield rs.process(mono) if rs else mono
+        if rs:
+            yield rs.flush()
+
+
+def _load_audio(path):
+    """Read an audio file as mono float32 at SAMPLE_RATE."""
+    return np.concatenate([np.zeros(0, dtype=np.float32), *iter_audio_16k(path)])
+
+
+def _resolve_server_exe():
+    """Resolve path to the whisper.cpp server binary, or None."""
+    p = os.getenv("FLOW_WHISPER_SERVER_BIN")
+    if p and os.path.isfile(p):
+        return os.path.abspath(p)
+    for candidate in SERVER_CANDIDATES:
+        if os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    w = shutil.which("whisper-server.exe")
+    return os.path.abspath(w) if w else None
+
+
+def _multipart_body(fields, file_name, file_bytes):
+    """Encode form fields plus one WAV file as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for key, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+        f"Content-Type: audio/wav\r\n\r\n".encode("utf-8")
+    )
+    parts.append(file_bytes)
+    parts.append(f"\r\n--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class WhisperServer(TranscriptionBackend):
+    """Long-lived whisper-server process that keeps MODEL_PATH loaded.
+
+    Audio is posted to /inference over a keep-alive HTTP connection. A monitor
+    thread health-checks the process and respawns it if it dies; after too many
+    respawns in a short window the server is marked failed so callers fall back
+    to the per-utterance CLI path.
+
+    A request runs under the caller's TranscriptionJob: its remaining time is
+    the socket timeout, and cancelling the job kills the server (which is
+    then respawned in the background) since an inference cannot be aborted
+    over HTTP.
+    """
+
+    name = "server"
+
+    def __init__(self, exe, model_path, host=SERVER_HOST, port=SERVER_PORT):
+        self.exe = exe
+        self.model_path = model_path
+        self.host = host
+        self.port = port
+        self.proc = None
+        self.conn = None
+        self.failed = False
+        self.lock = threading.Lock()
+        self._respawns = []
+        self._log_fh = None
+        self._stop = threading.Event()
+        self._monitor = None
+        self._aborted = False
+
+    def _spawn(self, count=True):
+        now = time.time()
+        self._respawns = [t for t in self._respawns if now - t < SERVER_RESPAWN_WINDOW_SEC]
+        if len(self._respawns) >= SERVER_MAX_RESPAWNS:
+            self.failed = True
+            log_line(f"SERVER: {len(self._respawns)} respawns in {SERVER_RESPAWN_WINDOW_SEC}s; giving up")
+            return False
+        if count:
+            self._respawns.append(now)
+
+        cmd = [
+            self.exe,
+            "-m", self.model_path,
+            "--host", self.host,
+            "--port", str(self.port),
+            "-l", "en",
+            *hw_profile.cli_args(self.model_path, "gpu"),
+            *shlex.split(os.getenv("FLOW_SERVER_ARGS", "")),
+        ]
+        env = os.environ.copy()
+        env["GGML_CUDA_FORCE_CUBLAS"] = "1"
+        if self._log_fh is None:
+            try:
+                self._log_fh = open(SERVER_LOG_FILE, "a", encoding="utf-8")
+            except Exception:
+                self._log_fh = subprocess.DEVNULL
+        log_line(f"SERVER: starting {cmd}")
+        self.proc = subprocess.Popen(
+            cmd,
+            cwd=os.path.dirname(self.exe) or ".",
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=self._log_fh,
+            stderr=subprocess.STDOUT,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self._close_conn()
+        return self._wait_ready(SERVER_STARTUP_TIMEOUT_SEC)
+
+    def _wait_ready(self, timeout_sec):
+        deadline = time.time() + timeout_sec
+        while time.time() < deadline:
+            if self.proc is None or self.proc.poll() is not None:
+                log_line(f"SERVER: exited during startup (code {self.proc.returncode if self.proc else None})")
+                return False
+            if self._healthy():
+                log_line(f"SERVER: ready on {self.host}:{self.port}")
+                return True
+            time.sleep(0.25)
+        log_line(f"SERVER: not ready after {timeout_sec}s")
+        self._kill()
+        return False
+
+    def _healthy(self):
+        """True once the server answers; 503 means the model is still loading."""
         try:
-            sz = os.path.getsize(MODEL_PATH)
-            safe_print(f"MODEL_SIZE -> {sz/1_000_000:.1f} MB")
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=2)
+            conn.request("GET", "/health")
+            status = conn.getresponse().status
+            conn.close()
+            return status != 503  # older servers have no /health (404) but only listen once loaded
         except Exception:
-            pass
-        model_info_logged = True
+            return False
 
-    duration_sec = None
-    try:
-        info = sf.info(filename)
-        if getattr(info, "samplerate", 0) and getattr(info, "frames", 0):
-            duration_sec = info.frames / float(info.samplerate)
-    except Exception:
-        duration_sec = None
+    def _close_conn(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
 
-    batch_size, best_of, mode_desc = _select_whisper_params(duration_sec)
-    
-    num_threads = str(os.cpu_count() or 4)
-    
-    cmd = build_whisper_cmd(
-        exe,
-        MODEL_PATH,
-        filename,
-        base_args=[
-            "-l", "en",
-            "-nt",
-            "-mc", "0",
-            "-bs", str(batch_size),
-            "-t", num_threads,
-            "-nfa",
-            "-otxt", "-of", out_txt[:-4],
-        ],
-    )
+    def _kill(self):
+        self._close_conn()
+        if self.proc is not None and self.proc.poll() is None:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=5)
+            except Exception:
+                pass
+
+    def ensure_running(self):
+        """Start or respawn the server if needed. Returns True when usable."""
+        with self.lock:
+            return self._ensure_running_locked()
+
+    def _ensure_running_locked(self):
+        if self.failed:
+            return False
+        if self.proc is not None and self.proc.poll() is None:
+            return True
+        if self.proc is not None:
+            log_line(f"SERVER: died (code {self.proc.returncode}); respawning")
+        # a deliberate kill (cancelled job) leaves proc None and is not a crash
+        return self._spawn(count=self.proc is not None)
+
+    def discard(self):
+        """Abort the request in flight for a cancelled job. Called without the lock."""
+        self._aborted = True
+        conn = self.conn
+        sock = getattr(conn, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+        proc = self.proc
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    def start(self):
+        """Spawn the server and the health monitor in the background."""
+        threading.Thread(target=self.ensure_running, daemon=True).start()
+        if self._monitor is None:
+            self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+            self._monitor.start()
+
+    def _monitor_loop(self):
+        while not self._stop.wait(SERVER_HEALTH_INTERVAL_SEC):
+            if self.failed:
+                return
+            if not self.lock.acquire(blocking=False):
+                continue  # a request is in flight; the server is evidently alive
+            try:
+                if self.proc is None:
+                    continue
+                if self.proc.poll() is None and not self._healthy():
+                    log_line("SERVER: health check failed; restarting")
+                    self._kill()
+                self._ensure_running_locked()
+            finally:
+                self.lock.release()
+
+    def transcribe(self, samples, beam_size, best_of=None):
+        """POST the audio to /inference and return the transcript text."""
+        wav_bytes = _wav_bytes(samples)
+        fields = {
+            "response_format": "json",
+            "language": "en",
+            "no_timestamps": "true",
+            "temperature": "0.0",
+            "beam_size": str(beam_size),
+        }
+        if best_of is not None:
+            fields["best_of"] = str(best_of)
+        body, content_type = _multipart_body(fields, "audio.wav", wav_bytes)
+
+        job = current_job()
+        with self.lock:
+            if job is not None:
+                job.check()
+                job.attach(self)
+            try:
+                for attempt in range(2):
+                    if not self._ensure_running_locked():
+                        raise RuntimeError("whisper-server unavailable")
+                    timeout = WHISPER_TIMEOUT_SEC if job is None else max(0.5, min(WHISPER_TIMEOUT_SEC, job.remaining()))
+                    try:
+                        if self.conn is None:
+                            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+                        else:
+                            self.conn.timeout = timeout
+                            if self.conn.sock is not None:
+                                self.conn.sock.settimeout(timeout)
+                        self.conn.request("POST", "/inference", body=body, headers={"Content-Type": content_type})
+                        resp = self.conn.getresponse()
+                        payload = resp.read().decode("utf-8", errors="replace")
+                    except (http.client.HTTPException, OSError) as e:
+                        # Stale keep-alive socket or dead process: reconnect once,
+                        # unless the job was cancelled or ran out of time
+                        log_line(f"SERVER: request error ({e}); attempt {attempt + 1}")
+                        self._close_conn()
+                        if job is not None:
+                            job.check()
+                        continue
+                    if resp.status != 200:
+                        raise RuntimeError(f"whisper-server HTTP {resp.status}: {payload[:200]}")
+                    try:
+                        return (json.loads(payload).get("text") or "").strip()
+                    except ValueError:
+                        return payload.strip()
+            finally:
+                if job is not None:
+                    job.detach(self)
+                if self._aborted:
+                    self._aborted = False
+                    self._kill()
+                    self.proc = None
+                    log_line("SERVER: killed for a cancelled job; respawning")
+                    threading.Thread(target=self.ensure_running, daemon=True).start()
+        raise RuntimeError("whisper-server request failed twice")
+
+    def close(self):
+        self._stop.set()
+        with self.lock:
+            self._kill()
+
+
+def _resolve_whisper_lib():
+    """Resolve path to whisper.dll (or libwhisper), or None."""
+    p = os.getenv("FLOW_WHISPER_LIB")
+    if p and os.path.isfile(p):
+        return os.path.abspath(p)
+    for candidate in LIB_CANDIDATES:
+        if os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    return ctypes.util.find_library("whisper")
+
+
+class _WhisperFullParamsHead(ctypes.Structure):
+    # Leading fields of whisper_full_params; stable across whisper.cpp releases.
+    _fields_ = [
+        ("strategy", ctypes.c_int),
+        ("n_threads", ctypes.c_int),
+        ("n_max_text_ctx", ctypes.c_int),
+        ("offset_ms", ctypes.c_int),
+        ("duration_ms", ctypes.c_int),
+        ("translate", ctypes.c_bool),
+        ("no_context", ctypes.c_bool),
+        ("no_timestamps", ctypes.c_bool),
+        ("single_segment", ctypes.c_bool),
+        ("print_special", ctypes.c_bool),
+        ("print_progress", ctypes.c_bool),
+        ("print_realtime", ctypes.c_bool),
+        ("print_timestamps", ctypes.c_bool),
+    ]
+
+
+WHISPER_SAMPLING_GREEDY = 0
+WHISPER_SAMPLING_BEAM_SEARCH = 1
+
+
+class LibWhisperBackend(TranscriptionBackend):
+    """whisper.cpp loaded in-process through ctypes.
+
+    The context is created once and reused; audio goes to whisper_full()
+    straight from the NumPy buffer, with no WAV file, process spawn or text
+    file in between.
+
+    whisper_full() and whisper_init_from_file_with_params() take their
+    params structs by value, and the struct layout changes between releases.
+    On Win64 a struct larger than 8 bytes is passed as a pointer to a caller
+    owned copy, so handing over the library's own *_default_params_by_ref()
+    allocation is ABI-identical and only the stable leading fields need to be
+    mirrored. Other platforms are reported as unavailable. Language ("en")
+    and beam width come from the library defaults: the greedy/beam_search
+    fields sit past the mirrored head, so only the strategy is chosen and
+    the backend is kept out of parameter tuning.
+    """
+
+    name = "lib"
+    tunable = False
+    DEFAULT_BEAM_SIZE = 5   # whisper_full_default_params(WHISPER_SAMPLING_BEAM_SEARCH)
+
+    def __init__(self, lib_path, model_path):
+        self.lib_path = lib_path
+        self.model_path = model_path
+        self.lib = None
+        self.ctx = None
+        self.lock = threading.Lock()
 
-    if best_of is not None:
-        cmd.extend(["-bo", str(best_of)])
-    
-    if duration_sec is not None:
-        params_info = f"bs={batch_size}" + (f", bo={best_of}" if best_of else "")
-        safe_print(f"[whisper] {duration_sec:.1f}s audio: {mode_desc} mode ({params_info})")
+    def _load(self):
+        if self.ctx is not None:
+            return
+        if sys.platform != "win32" or ctypes.sizeof(ctypes.c_void_p) != 8:
+            self.failed = True
+            raise RuntimeError("in-process whisper needs 64-bit Windows")
+        lib_dir = os.path.dirname(self.lib_path)
+        if lib_dir and hasattr(os, "add_dll_directory"):
+            os.add_dll_directory(lib_dir)  # ggml*.dll live next to whisper.dll
+        try:
+            lib = ctypes.CDLL(self.lib_path)
+        except OSError as e:
+            self.failed = True
+            raise RuntimeError(f"cannot load {self.lib_path}: {e}")
+
+        lib.whisper_full_default_params_by_ref.restype = ctypes.c_void_p
+        lib.whisper_full_default_params_by_ref.argtypes = [ctypes.c_int]
+        lib.whisper_full.restype = ctypes.c_int
+        lib.whisper_full.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_float), ctypes.c_int]
+        lib.whisper_full_n_segments.restype = ctypes.c_int
+        lib.whisper_full_n_segments.argtypes = [ctypes.c_void_p]
+        lib.whisper_full_get_segment_text.restype = ctypes.c_char_p
+        lib.whisper_full_get_segment_text.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.whisper_free.restype = None
+        lib.whisper_free.argtypes = [ctypes.c_void_p]
+        lib.whisper_free_params.restype = None
+        lib.whisper_free_params.argtypes = [ctypes.c_void_p]
+
+        t0 = time.time()
+        if hasattr(lib, "whisper_context_default_params_by_ref"):
+            lib.whisper_context_default_params_by_ref.restype = ctypes.c_void_p
+            lib.whisper_init_from_file_with_params.restype = ctypes.c_void_p
+            lib.whisper_init_from_file_with_params.argtypes = [ctypes.c_char_p, ctypes.c_void_p]
+            lib.whisper_free_context_params.argtypes = [ctypes.c_void_p]
+            cparams = lib.whisper_context_default_params_by_ref()
+            try:
+                ctx = lib.whisper_init_from_file_with_params(self.model_path.encode("utf-8"), cparams)
+            finally:
+                lib.whisper_free_context_params(cparams)
+        else:
+            lib.whisper_init_from_file.restype = ctypes.c_void_p
+            lib.whisper_init_from_file.argtypes = [ctypes.c_char_p]
+            ctx = lib.whisper_init_from_file(self.model_path.encode("utf-8"))
+        if not ctx:
+            self.failed = True
+            raise RuntimeError(f"whisper_init failed for {self.model_path}")
+        self.lib, self.ctx = lib, ctx
+        log_line(f"LIB: loaded {os.path.basename(self.model_path)} in {time.time() - t0:.1f}s via {self.lib_path}")
+
+    def start(self):
+        def _warm():
+            try:
+                with self.lock:
+                    self._load()
+            except Exception as e:
+                log_line(f"LIB: {e}")
+        threading.Thread(target=_warm, daemon=True).start()
+
+    def applied_params(self, beam_size, best_of=None):
+        if beam_size and beam_size > 1:
+            return self.DEFAULT_BEAM_SIZE, None
+        return 1, None
+
+    def transcribe(self, samples, beam_size, best_of=None):
+        samples = np.ascontiguousarray(samples, dtype=np.float32).reshape(-1)
+        if not samples.flags.writeable:
+            samples = samples.copy()
+        # Zero-copy view of the NumPy buffer for whisper_full()
+        pcm = (ctypes.c_float * samples.size).from_buffer(samples)
+
+        with self.lock:
+            self._load()
+            strategy = WHISPER_SAMPLING_BEAM_SEARCH if beam_size and beam_size > 1 else WHISPER_SAMPLING_GREEDY
+            params = self.lib.whisper_full_default_params_by_ref(strategy)
+            try:
+                head = _WhisperFullParamsHead.from_address(params)
+                head.n_threads = physical_core_count()
+                head.n_max_text_ctx = 0        # same as -mc 0
+                head.no_timestamps = True
+                head.print_progress = False
+                head.print_realtime = False
+                head.print_timestamps = False
+                rc = self.lib.whisper_full(self.ctx, params, pcm, samples.size)
+            finally:
+                self.lib.whisper_free_params(params)
+            if rc != 0:
+                raise RuntimeError(f"whisper_full returned {rc}")
+            n = self.lib.whisper_full_n_segments(self.ctx)
+            segments = [
+                (self.lib.whisper_full_get_segment_text(self.ctx, i) or b"").decode("utf-8", errors="replace")
+                for i in range(n)
+            ]
+        return "".join(segments).strip()
+
+    def close(self):
+        with self.lock:
+            if self.ctx is not None:
+                self.lib.whisper_free(self.ctx)
+                self.ctx = None
+
+
+class CT2Backend(TranscriptionBackend):
+    """CPU-only engine: an int8-quantised CTranslate2 Whisper model via faster-whisper.
+
+    Meant for seats without an NVIDIA GPU, where whisper-cli otherwise fails
+    its GPU attempt and reruns on CPU. The model is loaded once and reused.
+    Convert a model with:
+        ct2-transformers-converter --model openai/whisper-large-v3
+            --output_dir models/faster-whisper-large-v3 --quantization int8
+    """
+
+    name = "ct2"
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.model = None
+        self.lock = threading.Lock()
 
+    def _load(self):
+        if self.model is not None:
+            return
+        try:
+            from faster_whisper import WhisperModel
+        except Exception as e:
+            self.failed = True
+            raise RuntimeError(f"faster-whisper not installed ({e}); pip install faster-whisper")
+        t0 = time.time()
+        try:
+            # local_files_only: never download a model behind the user's back
+            self.model = WhisperModel(
+                self.model_path,
+                device="cpu",
+                compute_type="int8",
+                cpu_threads=physical_core_count(),
+                local_files_only=True,
+            )
+        except Exception as e:
+            self.failed = True
+            raise RuntimeError(f"cannot load CTranslate2 model {self.model_path}: {e}")
+        log_line(f"CT2: loaded {self.model_path} (int8, cpu) in {time.time() - t0:.1f}s")
+
+    def start(self):
+        def _warm():
+            try:
+                with self.lock:
+                    self._load()
+            except Exception as e:
+                log_line(f"CT2: {e}")
+        threading.Thread(target=_warm, daemon=True).start()
+
+    def transcribe(self, samples, beam_size, best_of=None):
+        samples = np.ascontiguousarray(samples, dtype=np.float32).reshape(-1)
+        kwargs = {
+            "language": "en",
+            "beam_size": beam_size,
+            "without_timestamps": True,
+            "condition_on_previous_text": False,  # same as -mc 0
+        }
+        if best_of is not None:
+            kwargs["best_of"] = best_of
+        with self.lock:
+            self._load()
+            segments, _info = self.model.transcribe(samples, **kwargs)
+            # segments is lazy; decoding happens while iterating
+            return "".join(seg.text for seg in segments).strip()
+
+    def close(self):
+        with self.lock:
+            self.model = None
+
+
+_backends = {}   # (engine, model path) -> backend, least recently used first
+_backends_lock = threading.Lock()
+
+def get_backend(name=None, model_path=None):
+    """Return the shared resident backend for ENGINE and model, or None to use whisper-cli.
+
+    Up to MODEL_CACHE_MAX models stay loaded so routing between them does not
+    reload on every switch; the least recently used one is closed beyond that.
+    """
+    name = name or ENGINE
+    if name not in RESIDENT_ENGINES:
+        return None
+    model_path = CT2_MODEL if name == "ct2" else (model_path or MODEL_PATH)
+    key = (name, model_path)
+    evicted = []
+    with _backends_lock:
+        backend = _backends.pop(key, None)
+        if backend is None:
+            if name == "server":
+                exe = _resolve_server_exe()
+                if exe is None:
+                    log_line("SERVER: whisper-server binary not found; using whisper-cli")
+                    return None
+                used_ports = {b.port for (n, _m), b in _backends.items() if n == "server"}
+                port = next(p for p in range(SERVER_PORT, SERVER_PORT + 100) if p not in used_ports)
+                backend = WhisperServer(exe, model_path, port=port)
+            elif name == "ct2":
+                backend = CT2Backend(model_path)
+            else:
+                lib_path = _resolve_whisper_lib()
+                if lib_path is None:
+                    log_line("LIB: whisper.dll not found; using whisper-cli")
+                    return None
+                backend = LibWhisperBackend(lib_path, model_path)
+            backend.start()
+        _backends[key] = backend
+        while len(_backends) > MODEL_CACHE_MAX:
+            oldest = next(iter(_backends))
+            evicted.append(_backends.pop(oldest))
+    for old in evicted:
+        log_line(f"ENGINE: unloading {os.path.basename(old.model_path)}")
+        old.close()
+    return None if backend.failed else backend
+
+
+def shutdown_engines():
+    """Close resident engines so no model-holding child process is orphaned."""
+    _reap_prelaunched(force=True)
+    for backend in list(_backends.values()):
+        try:
+            backend.close()
+        except Exception:
+            pass
+
+
+# --- Cancellable jobs ---
+class JobCancelled(Exception):
+    """Raised out of run_whisper() when its job is cancelled or passes its deadline."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def job_timeout(duration_sec):
+    if not duration_sec:
+        return WHISPER_TIMEOUT_SEC
+    return JOB_TIMEOUT_BASE_SEC + JOB_TIMEOUT_PER_AUDIO_SEC * duration_sec
+
+
+class TranscriptionJob:
+    """Deadline and cancel switch shared by every process one transcription starts.
+
+    Processes attach themselves while they run; cancel() kills them all, and
+    the next check() in the transcribing thread raises JobCancelled.
+    Resident in-process engines cannot be interrupted, so their result is
+    discarded instead.
+    """
+
+    def __init__(self, duration_sec=None):
+        self.duration_sec = duration_sec or 0.0
+        self.started = time.time()
+        self.deadline = self.started + job_timeout(duration_sec)
+        self.cancelled = threading.Event()
+        self.reason = None
+        self.lock = threading.Lock()
+        self.procs = set()
+        self.info = {}   # backend, model and params of the last decode, for batch records
+        self.pause_map = None   # PauseMap when the audio was pause-compressed
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.time())
+
+    def check(self):
+        if not self.cancelled.is_set() and time.time() > self.deadline:
+            self.cancel("deadline")
+        if self.cancelled.is_set():
+            raise JobCancelled(self.reason)
+
+    def attach(self, proc):
+        with self.lock:
+            self.procs.add(proc)
+            cancelled = self.cancelled.is_set()
+        if cancelled:
+            proc.discard()
+
+    def detach(self, proc):
+        with self.lock:
+            self.procs.discard(proc)
+
+    def cancel(self, reason="cancelled"):
+        with self.lock:
+            if self.cancelled.is_set():
+                return
+            self.reason = reason
+            self.cancelled.set()
+            procs = list(self.procs)
+        log_line(f"[job] {reason} after {time.time() - self.started:.1f}s; killing {len(procs)} process(es)")
+        for proc in procs:
+            proc.discard()
+
+
+_job_local = threading.local()
+
+def current_job():
+    return getattr(_job_local, "job", None)
+
+
+@contextlib.contextmanager
+def job_scope(job):
+    """Make job the current job of this thread for the duration of the block."""
+    prev = current_job()
+    _job_local.job = job
+    try:
+        yield job
+    finally:
+        _job_local.job = prev
+
+
+def _kill_tree(proc):
+    """Kill a child process and anything it spawned."""
+    if proc.poll() is not None:
+        return
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], capture_output=True,
+                       creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+    if proc.poll() is None:
+        proc.kill()
+
+
+def _run_cli(cmd, workdir, wav_bytes=None, env=None):
+    """Run a whisper-cli command under the current job, piping wav_bytes to stdin when given.
+
+    Returns the CompletedProcess with stdout/stderr decoded to str. Raises
+    JobCancelled when the job is cancelled or runs out of time.
+    """
+    return CliProcess(cmd, workdir, env).run(wav_bytes)
+
+
+def _cli_env():
     env = os.environ.copy()
     env["GGML_CUDA_FORCE_CUBLAS"] = "1"
-    log_line(f"DEBUG exe = {exe}")
-    log_line(f"DEBUG wav_path = {filename}")
-    log_line(f"DEBUG cmd = {cmd}")
-
-    res = subprocess.run(
-        cmd,
-        cwd=workdir,
-        env=env,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
+    return env
 
-    stderr_lower = (res.stderr or "").lower()
-    if "cuda" in stderr_lower and "found" in stderr_lower and res.returncode == 0:
-        log_line(f"CUDA_INIT: Detected CUDA initialization in stderr")
-    
-    def _looks_cuda_assert(s: str) -> bool:
-        return ("GGML_ASSERT" in (s or "")) or ("Incorrect KV cache padding" in (s or ""))
 
-    cuda_error_type, cuda_error_msg, cuda_snippet = _parse_cuda_error(res.stderr)
-    
-    if res.returncode != 0 or _looks_cuda_assert(res.stderr) or cuda_error_type:
-        if cuda_error_type:
-            safe_print(f"[whisper] CUDA error ({cuda_error_type}): {cuda_error_msg}")
-            log_line(f"CUDA_ERROR type={cuda_error_type} msg={cuda_error_msg}")
-            if cuda_snippet:
-                log_line(f"CUDA_ERROR snippet: {cuda_snippet}")
-        elif res.returncode != 0:
-            safe_print(f"[whisper] Process failed (exit code {res.returncode}); retrying on CPU")
-            log_line(f"PROCESS_ERROR exit_code={res.returncode}")
-        else:
-            safe_print("[whisper] CUDA failed; retrying on CPU")
-        
-        cpu_batch_size = min(batch_size, 5)
-        cpu_best_of = min(best_of, 3) if best_of else None
-        
-        cpu_args = [
+# Minimal argument set every whisper-cli/main.exe build accepts
+CLI_SAFE_ARGS = ["-l", "en", "-nt", "-bs", "5"]
+
+def _whisper_cli_cmd(exe, filename, batch_size, best_of, gpu=True, model_path=None):
+    """Command line for a whisper-cli attempt with the given decoding params."""
+    cmd = build_whisper_cmd(
+        exe,
+        model_path or MODEL_PATH,
+        filename,
+        base_args=[
             "-l", "en",
             "-nt",
             "-mc", "0",
-            "-bs", str(cpu_batch_size),
-            "-t", num_threads,
-            "-nfa",
-            "-otxt", "-of", out_txt[:-4],
-            "--no-gpu"
-        ]
-        
-        if cpu_best_of:
-            cpu_args.extend(["-bo", str(cpu_best_of)])
-        
-        cmd_cpu = build_whisper_cmd(exe, MODEL_PATH, filename, base_args=cpu_args)
-        
-        safe_print(f"[whisper] CPU fallback: bs={cpu_batch_size}" + (f", bo={cpu_best_of}" if cpu_best_of else "") + f", threads={num_threads}")
-        
-        res = subprocess.run(
-            cmd_cpu,
+            "-bs", str(batch_size),
+            *([] if gpu else ["--no-gpu"]),
+        ],
+        tuned="gpu" if gpu else "cpu",
+    )
+    if best_of is not None:
+        cmd.extend(["-bo", str(best_of)])
+    return cmd
+
+
+# --- Pre-launch on key-down ---
+class CliProcess:
+    """whisper-cli process that receives its WAV on stdin and can be killed.
+
+    Every whisper-cli run goes through here so it is bound to a job's
+    deadline. Also used to pre-launch on key-down, so model load and CUDA init
+    overlap speech (whisper-cli loads the model before reading its input and
+    sits blocked on stdin until run()), and for the hedged GPU/CPU race.
+    """
+
+    def __init__(self, cmd, workdir, env):
+        self.cmd = cmd
+        self.started = time.time()
+        self.armed = self.started  # last key-down that wanted this process
+        self.proc = subprocess.Popen(
+            cmd,
             cwd=workdir,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        worker = current_core_worker()
+        if worker is not None:
+            worker.pin(self.proc)
+        self.job = None
+        self.bind(current_job())
+
+    def bind(self, job):
+        """Tie this process to job, so cancelling the job kills it."""
+        self.job = job
+        if job is not None:
+            job.attach(self)
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def run(self, wav_bytes):
+        job = self.job
+        timeout = job.remaining() if job is not None else WHISPER_TIMEOUT_SEC
+        try:
+            out, err = self.proc.communicate(wav_bytes, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.discard()
+            if job is None:
+                raise JobCancelled("deadline")
+            job.cancel("deadline")
+        finally:
+            if job is not None:
+                job.detach(self)
+        if job is not None:
+            job.check()
+        return subprocess.CompletedProcess(
+            self.cmd,
+            self.proc.returncode,
+            (out or b"").decode("utf-8", errors="replace"),
+            (err or b"").decode("utf-8", errors="replace"),
         )
-    safe_print(f"[whisper] exit={res.returncode} stdout={len(res.stdout)}B stderr={len(res.stderr)}B out='{out_txt}'")
 
-    text = ""
+    def discard(self):
+        if self.alive():
+            try:
+                _kill_tree(self.proc)
+                self.proc.wait(timeout=5)
+            except Exception:
+                pass
+
+
+_prelaunch_lock = threading.Lock()
+_prelaunched = None
+
+def prelaunch_engine():
+    """Wake the resident engine, or start whisper-cli for the expected short utterance.
+
+    An unused pre-launched process is kept for the next key-down and torn
+    down after PRELAUNCH_IDLE_SEC so it does not hold VRAM indefinitely.
+    No process is started while earlier recordings are still transcribing.
+    """
+    global _prelaunched
     try:
-        if os.path.exists(out_txt):
-            with open(out_txt, "r", encoding="utf-8", errors="replace") as fh:
-                text = fh.read().strip()
+        model_path = route_model(param_tuner.typical_duration()) if MODEL_ROUTING else MODEL_PATH
+        backend = get_backend(model_path=model_path)
+        if backend is not None:
+            backend.start()
+            return
+        with _inflight_lock:
+            busy = _inflight > 0
+        if busy or dictation_queue.depth() > 0:
+            # an earlier recording is still decoding; a second model would share its VRAM
+            log_line("[prelaunch] skipped: transcription in progress")
+            return
+        exe = os.path.abspath(_resolve_whisper_exe(resolved_whisper_bin or WHISPER_BIN))
+        expected = "cpu" if gpu_breaker.is_open() else "gpu"
+        batch_size, best_of, _ = _select_whisper_params(None, expected, model_path)  # typical duration
+        if expected == "cpu":
+            cmd = _whisper_cli_cmd(exe, "-", min(batch_size, 5), min(best_of, 3) if best_of else None,
+                                   gpu=False, model_path=model_path)
+        else:
+            cmd = _whisper_cli_cmd(exe, "-", batch_size, best_of, model_path=model_path)
+        with _prelaunch_lock:
+            if _prelaunched is not None and _prelaunched.alive() and _prelaunched.cmd == cmd:
+                _prelaunched.armed = time.time()
+            else:
+                if _prelaunched is not None:
+                    _prelaunched.discard()
+                _prelaunched = CliProcess(cmd, os.path.dirname(exe) or ".", _cli_env())
+        reaper = threading.Timer(PRELAUNCH_IDLE_SEC + 1, _reap_prelaunched)
+        reaper.daemon = True
+        reaper.start()
     except Exception as e:
-        safe_print(f"[whisper] read file error: {e}")
+        log_line(f"PRELAUNCH: {e}")
 
-    if not text:
-        text = (res.stdout or "").strip()
+
+def _hedged_cli_run(gpu_cmd, cpu_cmd, workdir, env, wav_bytes, duration_class):
+    """Race whisper-cli on GPU against CPU. Returns (res, winner, gpu_failure).
+
+    The CPU run starts at once if the GPU failed recently, otherwise when the
+    GPU run passes its p95 wall time for this duration class. The first valid transcript
+    wins and the other process is killed. If the GPU fails before any CPU run
+    was started, its result is returned so the caller can run the fault ladder.
+    """
+    results = queue.Queue()
+    procs = {}
+    started = {}
+
+    def _launch(label, cmd, run_env):
+        proc = _take_prelaunched(cmd) or CliProcess(cmd, workdir, run_env)
+        procs[label] = proc
+        started[label] = time.time()
+
+        def _run():
+            try:
+                results.put((label, proc.run(wav_bytes)))
+            except Exception as e:
+                results.put((label, e))
+        threading.Thread(target=_run, daemon=True).start()
+
+    _launch("gpu", gpu_cmd, env)
+    deadline = 0.0 if gpu_breaker.recently_failed() else gpu_latency.p95(duration_class)
+    pending = {"gpu"}
+    gpu_failure = None
+    last = None
+    while pending:
+        timeout = None
+        if "cpu" not in procs and deadline is not None:
+            timeout = max(0.0, started["gpu"] + deadline - time.time())
+        try:
+            label, res = results.get(timeout=timeout)
+        except queue.Empty:
+            safe_print(f"[whisper] GPU past {deadline:.2f}s deadline; hedging on CPU")
+            _launch("cpu", cpu_cmd, None)
+            pending.add("cpu")
+            continue
+        pending.discard(label)
+        if isinstance(res, Exception):
+            for other in pending:
+                procs[other].discard()
+            raise res
+        last = (res, label)
+        failure = _classify_cli_failure(res)
+        if label == "gpu":
+            gpu_failure = failure
+            if failure is None:
+                gpu_latency.add(duration_class, time.time() - started["gpu"])
+        if failure is None and (res.stdout or "").strip():
+            for other in pending:
+                procs[other].discard()
+            if len(procs) > 1:
+                safe_print(f"[whisper] hedge won by {label} in {time.time() - started[label]:.2f}s")
+            return res, label, gpu_failure
+        if label == "gpu" and "cpu" not in procs:
+            return res, label, gpu_failure
+    return last[0], last[1], gpu_failure
+
+
+def _take_prelaunched(cmd):
+    """Hand over the pre-launched process if it was started with exactly cmd.
+
+    Otherwise it is torn down before the caller spawns its own process, so
+    two copies of the model never sit in VRAM together.
+    """
+    global _prelaunched
+    with _prelaunch_lock:
+        pre = _prelaunched
+        _prelaunched = None
+    if pre is None:
+        return None
+    if not pre.alive() or pre.cmd != cmd:
+        pre.discard()
+        return None
+    pre.bind(current_job())
+    return pre
+
+
+def _reap_prelaunched(force=False):
+    global _prelaunched
+    with _prelaunch_lock:
+        pre = _prelaunched
+        if pre is not None and (force or time.time() - pre.armed >= PRELAUNCH_IDLE_SEC):
+            pre.discard()
+            _prelaunched = None
+
+
+def run_whisper(audio, bin_path, model_path=None):
+    """Transcribe an audio file path or an int16/float32 sample array at SAMPLE_RATE.
+
+    model_path defaults to MODEL_PATH, or to route_model() with MODEL_ROUTING.
+    A resident backend (ENGINE "server"/"lib"/"ct2") is tried first; whisper-cli
+    is the fallback. Returns (returncode, text, stderr).
+
+    Runs under the calling thread's TranscriptionJob, or a new one with a
+    deadline scaled to the audio length; raises JobCancelled if it is
+    cancelled or times out.
+    """
+    global _inflight
+    job = current_job()
+    if job is None:
+        with job_scope(TranscriptionJob(_audio_duration(audio))):
+            return run_whisper(audio, bin_path, model_path)
+    job.check()
+    if isinstance(audio, str):
+        duration_sec = _stream_decode_duration(audio)
+        # without FLOW_CHUNKING whisper-cli reads a finished spill WAV in one run,
+        # like any dictation; resident engines would otherwise load it whole
+        if duration_sec is not None and (ENGINE in RESIDENT_ENGINES or CHUNKING or not is_spill_file(audio)):
+            return _run_file_streamed(audio, bin_path, model_path, duration_sec)
+    if CHUNKING and isinstance(audio, np.ndarray) and len(audio) >= CHUNK_MIN_SEC * SAMPLE_RATE:
+        if model_path is None:
+            model_path = route_model(len(audio) / SAMPLE_RATE) if MODEL_ROUTING else MODEL_PATH
+        return _run_chunked(audio, bin_path, model_path)
+    with _inflight_lock:
+        _inflight += 1
+    try:
+        return _run_whisper(audio, bin_path, model_path)
+    finally:
+        with _inflight_lock:
+            _inflight -= 1
+
+
+def _chunk_bounds(audio, chunk_sec=CHUNK_SEC, overlap_sec=CHUNK_OVERLAP_SEC, search_sec=CHUNK_SEARCH_SEC):
+    """Split long audio into [(start, end)] sample ranges.
+
+    Each nominal boundary moves to the quietest 20 ms frame within search_sec
+    of it, so cuts land in pauses rather than mid-word, and every chunk runs
+    overlap_sec past its cut for the seam de-duplication in _merge_overlap().
+    """
+    n = len(audio)
+    frame = int(0.02 * SAMPLE_RATE)
+    n_frames = n // frame
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+    chunk = int(chunk_sec * SAMPLE_RATE)
+    search = int(search_sec * SAMPLE_RATE)
+    overlap = int(overlap_sec * SAMPLE_RATE)
+    bounds = []
+    start = 0
+    while n - start > chunk + search:
+        lo = (start + chunk - search) // frame
+        hi = (start + chunk + search) // frame
+        cut = (lo + int(np.argmin(energy[lo:hi]))) * frame
+        bounds.append((start, min(n, cut + overlap)))
+        start = cut
+    bounds.append((start, n))
+    return bounds
+
+
+def _run_chunked(audio, bin_path, model_path):
+    """Decode long audio as parallel chunks and stitch the text back together."""
+    bounds = _chunk_bounds(audio)
+    workers = chunk_workers()
+    safe_print(f"[chunk] {len(audio) / SAMPLE_RATE:.1f}s audio -> {len(bounds)} chunks on {workers} workers")
+    t0 = time.time()
+    job = current_job()
+    core = current_core_worker()
+
+    def _decode(b):
+        with job_scope(job), core_scope(core):
+            return run_whisper(audio[b[0]:b[1]], bin_path, model_path)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_decode, bounds))
+    text = ""
+    for rc, out, err in results:
+        if rc != 0:
+            return rc, out, err
+        text = _merge_overlap(text, _clean_transcript(out))
+    safe_print(f"[chunk] {len(bounds)} chunks in {time.time() - t0:.2f}s")
+    return 0, text, ""
+
+
+def _stream_decode_duration(path):
+    """Duration of a file that should go through iter_audio_16k(), or None.
+
+    Long files and anything not 16 kHz mono are decoded here in blocks;
+    short 16 kHz mono files and formats soundfile cannot read go to
+    whisper-cli as they are.
+    """
+    try:
+        info = sf.info(path)
+    except Exception:
+        return None
+    duration_sec = info.frames / float(info.samplerate) if info.samplerate else 0.0
+    if info.samplerate != SAMPLE_RATE or info.channels != 1 or duration_sec >= CHUNK_MIN_SEC:
+        return duration_sec
+    return None
+
+
+def _run_file_streamed(path, bin_path, model_path, duration_sec):
+    """Transcribe a file chunk by chunk straight from disk.
+
+    Blocks from iter_audio_16k() are cut at pauses as in _chunk_bounds()
+    and decoded by up to chunk_workers() run_whisper() calls; at most that
+    many chunks wait undecoded, so memory is bounded by a few chunks
+    regardless of the file length.
+    """
+    if model_path is None:
+        model_path = route_model(duration_sec) if MODEL_ROUTING else MODEL_PATH
+    cache_key = None
+    if TRANSCRIPT_CACHE and not is_spill_file(path):
+        # engine and param source decide which backend and beams every chunk gets
+        cache_key = transcript_cache.key(path, model_path, ["streamed", CHUNK_SEC, CHUNK_OVERLAP_SEC, ACCURACY_PREF,
+                                                            ENGINE, _model_label(ENGINE, model_path), LATENCY_BUDGET_SEC])
+        cached = transcript_cache.get(cache_key)
+        if isinstance(cached, dict):
+            safe_print(f"[whisper] cached transcript ({len(cached['text'])} chars)")
+            current_job().info.update(cached.get("info") or {}, backend="cache")
+            return 0, cached["text"], ""
+    safe_print(f"[stream-file] {os.path.basename(path)}: {duration_sec:.0f}s, decoding in {CHUNK_SEC:.0f}s chunks")
+
+    job = current_job()
+    core = current_core_worker()
+
+    def _decode(chunk):
+        with job_scope(job), core_scope(core):
+            return run_whisper(chunk, bin_path, model_path)
+
+    limit = int((CHUNK_SEC + CHUNK_SEARCH_SEC) * SAMPLE_RATE)
+    # a spilled dictation decodes in parallel only with FLOW_CHUNKING, like in-memory audio
+    workers = chunk_workers() if CHUNKING or not is_spill_file(path) else 1
+    pending = collections.deque()
+    text = ""
+    failure = None
+    buf = np.zeros(0, dtype=np.float32)
+
+    def _collect(keep):
+        nonlocal text, failure
+        while len(pending) > keep and failure is None:
+            rc, out, err = pending.popleft().result()
+            if rc != 0:
+                failure = (rc, out, err)
+            else:
+                text = _merge_overlap(text, _clean_transcript(out))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for block in iter_audio_16k(path):
+                buf = np.concatenate([buf, block])
+                while len(buf) > limit and failure is None:
+                    (_s0, end), (next_start, _e1) = _chunk_bounds(buf)[:2]
+                    pending.append(pool.submit(_decode, buf[:end]))
+                    buf = buf[next_start:]
+                    _collect(workers)
+                if failure is not None:
+                    break
+            if failure is None and len(buf) >= int(MIN_SEC * SAMPLE_RATE):
+                pending.append(pool.submit(_decode, buf))
+            _collect(0)
+        finally:
+            for fut in pending:
+                fut.cancel()
+    if failure is not None:
+        return failure
+    if cache_key and text:
+        # chunk decodes fill job.info; keep it so a hit can report the same backend, model and params
+        transcript_cache.put(cache_key, {"text": text, "info": dict(job.info)})
+    return 0, text, ""
+
+
+def _audio_duration(audio):
+    """Length in seconds of a sample array or audio file, or None if unknown."""
+    if isinstance(audio, np.ndarray):
+        return len(audio) / float(SAMPLE_RATE)
+    try:
+        info = sf.info(audio)
+        if getattr(info, "samplerate", 0) and getattr(info, "frames", 0):
+            return info.frames / float(info.samplerate)
+    except Exception:
+        pass
+    return None
+
+
+def _run_whisper(audio, bin_path, model_path):
+    global model_info_logged
+    if not model_info_logged:
+        safe_print(f"MODEL_PATH -> {MODEL_PATH}")
+        try:
+            sz = os.path.getsize(MODEL_PATH)
+            safe_print(f"MODEL_SIZE -> {sz/1_000_000:.1f} MB")
+        except Exception:
+            pass
+        model_info_logged = True
+
+    duration_sec = _audio_duration(audio)
+    if isinstance(audio, np.ndarray) and DEBUG_AUDIO:
+        try:
+            sf.write(WAV_TMP, audio, SAMPLE_RATE)
+        except Exception as e:
+            log_line(f"WAV write error: {e}")
+
+    if model_path is None:
+        model_path = route_model(duration_sec) if MODEL_ROUTING else MODEL_PATH
+
+    backend = get_backend(model_path=model_path)
+    expected = backend.name if backend is not None else ("cpu" if gpu_breaker.is_open() else "gpu")
+    batch_size, best_of, mode_desc = _select_whisper_params(duration_sec, expected, model_path)
+    duration_class = _static_whisper_params(duration_sec)[2]
+
+    if duration_sec is not None:
+        params_info = f"bs={batch_size}" + (f", bo={best_of}" if best_of else "")
+        safe_print(f"[whisper] {duration_sec:.1f}s audio: {mode_desc} mode ({params_info}, {_model_label(expected, model_path)})")
+
+    cache_key = None
+    if TRANSCRIPT_CACHE and not isinstance(audio, np.ndarray) and not is_spill_file(audio):
+        cache_key = transcript_cache.key(audio, model_path, [expected, batch_size, best_of])
+        cached = transcript_cache.get(cache_key)
+        if isinstance(cached, str):
+            safe_print(f"[whisper] cached transcript ({len(cached)} chars)")
+            current_job().info.update(backend="cache", model=_model_label(expected, model_path),
+                                      beam_size=batch_size, best_of=best_of)
+            return 0, cached, ""
+
+    if backend is not None:
+        try:
+            samples = _float_samples(audio) if isinstance(audio, np.ndarray) else _load_audio(audio)
+            t0 = time.time()
+            text = backend.transcribe(samples, batch_size, best_of)
+            current_job().check()
+            used_bs, used_bo = backend.applied_params(batch_size, best_of)
+            current_job().info.update(backend=backend.name, model=_model_label(backend.name, model_path),
+                                      beam_size=used_bs, best_of=used_bo)
+            wall = time.time() - t0
+            safe_print(f"[whisper] {backend.name}: {len(text)} chars in {wall:.2f}s"
+                       + (f" (bs={used_bs}, library default)" if (used_bs, used_bo) != (batch_size, best_of) else ""))
+            if backend.tunable:
+                param_tuner.record(duration_sec, batch_size, best_of, backend.name, wall, model_path)
+            if cache_key and text:
+                transcript_cache.put(cache_key, text)
+            return 0, text, ""
+        except JobCancelled:
+            raise
+        except Exception as e:
+            log_line(f"ENGINE_ERROR {backend.name}: {e}; falling back to whisper-cli")
+
+    # In-memory audio goes to whisper-cli on stdin ("-") and the transcript
+    # comes back on stdout, so nothing touches the disk unless debugging.
+    filename = audio
+    wav_bytes = None
+    if isinstance(audio, np.ndarray):
+        wav_bytes = _wav_bytes(audio)
+        filename = "-"
+
+    exe = os.path.abspath(_resolve_whisper_exe(bin_path))
+    workdir = os.path.dirname(exe) or "."
+
+    env = _cli_env()
+    log_line(f"DEBUG exe = {exe}")
+    log_line(f"DEBUG wav_path = {filename}" + (f" ({len(wav_bytes)} bytes on stdin)" if wav_bytes is not None else ""))
+
+    timing = {}  # backend/params/wall of the attempt whose result is kept, for the tuner
+
+    def _attempt(label, cmd, run_env=None, bs=None, bo=None):
+        log_line(f"DEBUG cmd[{label}] = {cmd}")
+        t0 = time.time()
+        pre = _take_prelaunched(cmd)
+        if pre is not None:
+            log_line(f"DEBUG using whisper-cli pre-launched {time.time() - pre.started:.1f}s ago")
+            res = pre.run(wav_bytes)
+        else:
+            res = _run_cli(cmd, workdir, wav_bytes, env=run_env)
+        timing.clear()
+        if bs is not None:
+            timing.update(backend="cpu" if label == "cpu" else "gpu", bs=bs, bo=bo, wall=time.time() - t0)
+        return res
+
+    cpu_batch_size = min(batch_size, 5)
+    cpu_best_of = min(best_of, 3) if best_of else None
+    cpu_cmd = _whisper_cli_cmd(exe, filename, cpu_batch_size, cpu_best_of, gpu=False, model_path=model_path)
+
+    # GPU fault ladder: full params, then a smaller beam on OOM or the
+    # known-good arguments on an assert, and only then the CPU.
+    res = None
+    failure = None
+    cpu_res = None
+    if gpu_breaker.allow():
+        gpu_cmd = _whisper_cli_cmd(exe, filename, batch_size, best_of, model_path=model_path)
+        if HEDGE and wav_bytes is not None:
+            log_line(f"DEBUG cmd[hedged] = {gpu_cmd} | {cpu_cmd}")
+            res, winner, failure = _hedged_cli_run(gpu_cmd, cpu_cmd, workdir, env, wav_bytes, duration_class)
+            if winner == "cpu":
+                cpu_res = res
+        else:
+            res = _attempt("gpu", gpu_cmd, env, batch_size, best_of)
+            failure = _classify_cli_failure(res)
+            if failure is None:
+                gpu_latency.add(duration_class, timing["wall"])
+    if cpu_res is None and failure is not None and res is not None:
+        if failure == "OOM":
+            small_bs = max(1, batch_size // 2)
+            safe_print(f"[whisper] GPU out of memory; retrying on GPU with bs={small_bs}")
+            res = _attempt("gpu-small", _whisper_cli_cmd(exe, filename, small_bs, None, model_path=model_path), env, small_bs)
+            failure = _classify_cli_failure(res)
+        elif failure in ("ASSERT", "KV_CACHE"):
+            safe_print(f"[whisper] GPU {failure}; retrying on GPU with known-good args")
+            res = _attempt("gpu-safe", build_whisper_cmd(exe, model_path, filename, base_args=CLI_SAFE_ARGS), env)
+            failure = _classify_cli_failure(res)
+    if res is not None and failure != "BAD_ARGS" and not (cpu_res is not None and failure is None):
+        # (a GPU run killed after losing the race says nothing about GPU health)
+        gpu_breaker.record(failure is None, failure)
+        stderr_lower = (res.stderr or "").lower()
+        if "cuda" in stderr_lower and "found" in stderr_lower and res.returncode == 0:
+            log_line(f"CUDA_INIT: Detected CUDA initialization in stderr")
+    if res is None:
+        safe_print("[whisper] GPU circuit open; skipping GPU attempt")
+        failure = "BREAKER_OPEN"
+
+    if cpu_res is not None:
+        res = cpu_res
+    elif failure is not None and failure != "BAD_ARGS":
+        safe_print(f"[whisper] CPU fallback: bs={cpu_batch_size}" + (f", bo={cpu_best_of}" if cpu_best_of else "") + f", threads={hw_profile.get(model_path, 'cpu')['threads']}")
+        res = _attempt("cpu", cpu_cmd, None, cpu_batch_size, cpu_best_of)
+    safe_print(f"[whisper] exit={res.returncode} stdout={len(res.stdout)}B stderr={len(res.stderr)}B")
+
+    text = (res.stdout or "").strip()
+    if text and res.returncode == 0 and timing:
+        param_tuner.record(duration_sec, timing["bs"], timing["bo"], timing["backend"], timing["wall"], model_path)
 
     def _looks_bad(s: str) -> bool:
         s = (s or "").lower()
@@ -1836,90 +4277,450 @@ def run_whisper(filename, bin_path):
 
     if not text and _looks_bad(res.stderr):
         safe_print("[whisper] bad-args fallback")
-        cmd_fallback = build_whisper_cmd(
-            exe,
-            MODEL_PATH,
-            filename,
-            base_args=["-l", "en", "-nt", "-bs", "5", "-otxt", "-of", out_txt[:-4]],
-        )
-        res = subprocess.run(
-            cmd_fallback,
-            cwd=workdir,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-        )
-        try:
-            if os.path.exists(out_txt):
-                with open(out_txt, "r", encoding="utf-8", errors="replace") as fh:
-                    text = fh.read().strip()
-        except Exception:
-            pass
-        if not text:
-            text = (res.stdout or "").strip()
+        cmd_fallback = build_whisper_cmd(exe, model_path, filename, base_args=CLI_SAFE_ARGS)
+        res = _run_cli(cmd_fallback, workdir, wav_bytes)
+        text = (res.stdout or "").strip()
 
     if not text:
         safe_print("[whisper] empty transcript; stderr head:")
         safe_print((res.stderr or "")[:500])
 
+    on_cpu = cpu_res is not None or timing.get("backend") == "cpu"
+    current_job().info.update(
+        backend="cpu" if on_cpu else "gpu",
+        model=os.path.basename(model_path),
+        beam_size=timing["bs"] if timing else (cpu_batch_size if on_cpu else batch_size),
+        best_of=timing["bo"] if timing else (cpu_best_of if on_cpu else best_of),
+    )
+    if cache_key and text and res.returncode == 0:
+        transcript_cache.put(cache_key, text)
     return res.returncode, text, (res.stderr or "").strip()
 
 
-def _transcribe_and_paste(wav_path):
-    safe_print("[whisper] running...")
-    set_status_safe("⚙️ Transcribing...", Theme.BG_ELEVATED, Theme.INFO, Theme.INFO)
-    bin_path = (resolved_whisper_bin or WHISPER_BIN)
-    rc, out, err = run_whisper(wav_path, bin_path)
-
-    if rc != 0:
-        notify("❌ Transcription failed")
-        set_status_safe("❌ Failed", Theme.ERROR, Theme.TEXT_PRIMARY, Theme.ERROR)
-        safe_print(f"[whisper] exit={rc} stderr={err[:400]}")
-        return
-
-    raw = (out or "").strip()
-    text = sanitize_transcript(raw)
-
-    def _dedupe_lines(s: str) -> str:
-        seen = []
-        for ln in s.splitlines():
-            if not seen or seen[-1] != ln:
-                seen.append(ln)
-        return "\n".join(seen)
-
-    text = _dedupe_lines(text)
-
+def _merge_overlap(prev, new, max_words=15):
+    """Join transcripts of overlapping audio, dropping the words repeated at the seam."""
+    if not prev:
+        return new
+    if not new:
+        return prev
+    a, b = prev.split(), new.split()
+    norm = lambda w: re.sub(r"[^\w']", "", w.lower())
+    tail = [norm(w) for w in a[-max_words:]]
+    head = [norm(w) for w in b[:max_words]]
+    for k in range(min(len(tail), len(head)), 0, -1):
+        if tail[-k:] == head[:k]:
+            return " ".join(a + b[k:])
+    return prev + " " + new
+
+
+class StreamingTranscriber:
+    """Decode fixed-size overlapping windows while the hotkey is still held.
+
+    Windows of STREAM_WINDOW_SEC advance by the window minus STREAM_OVERLAP_SEC.
+    Each decoded window is merged into the committed text right away, so on
+    release only the audio from the last window start onwards is decoded.
+    """
+
+    def __init__(self, bin_path):
+        self.bin_path = bin_path
+        self.blocks = []
+        self.base = 0           # sample offset of blocks[0]; older blocks are dropped once decoded
+        self.total = 0
+        self.next_start = 0     # sample offset of the next window
+        self.committed = ""
+        self.failed = False
+        self.done = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def feed(self, block):
+        with self.cond:
+            self.blocks.append(block.reshape(-1))
+            self.total += block.shape[0]
+            self.cond.notify()
+
+    def _worker(self):
+        win = int(STREAM_WINDOW_SEC * SAMPLE_RATE)
+        hop = win - int(STREAM_OVERLAP_SEC * SAMPLE_RATE)
+        while True:
+            with self.cond:
+                while not self.done and self.total < self.next_start + win:
+                    self.cond.wait()
+                if self.done:
+                    return
+                start = self.next_start - self.base
+                window = np.concatenate(self.blocks)[start:start + win]
+            try:
+                rc, out, _err = run_whisper(window, self.bin_path)
+            except JobCancelled as e:
+                rc, out = -1, ""
+                log_line(f"[stream] window {e.reason}")
+            if rc != 0:
+                log_line(f"[stream] window at {self.next_start / SAMPLE_RATE:.1f}s failed (rc={rc})")
+                self.failed = True
+                return
+            self.committed = _merge_overlap(self.committed, sanitize_transcript(out))
+            with self.cond:
+                self.next_start += hop
+                while self.blocks and self.base + len(self.blocks[0]) <= self.next_start:
+                    self.base += len(self.blocks.pop(0))
+            safe_print(f"[stream] committed up to {self.next_start / SAMPLE_RATE:.1f}s")
+
+    def cancel(self):
+        with self.cond:
+            self.done = True
+            self.cond.notify()
+
+    def finish(self, audio):
+        """Decode the remaining tail of audio and return (rc, text, stderr)."""
+        self.cancel()
+        self.thread.join()
+        if self.failed:
+            return run_whisper(audio, self.bin_path)
+        text = self.committed
+        if isinstance(audio, str):
+            tail, _sr = sf.read(audio, start=self.next_start, dtype="int16")
+        else:
+            tail = audio[self.next_start:]
+        if len(tail) >= int(MIN_SEC * SAMPLE_RATE):
+            rc, out, err = run_whisper(tail, self.bin_path)
+            if rc != 0:
+                return rc, out, err
+            text = _merge_overlap(text, sanitize_transcript(out))
+        return 0, text, ""
+
+
+def _dedupe_lines(s: str) -> str:
+    seen = []
+    for ln in s.splitlines():
+        if not seen or seen[-1] != ln:
+            seen.append(ln)
+    return "\n".join(seen)
+
+
+def _clean_transcript(out):
+    """Sanitize raw whisper output; returns "" when there is nothing to paste."""
+    text = _dedupe_lines(sanitize_transcript((out or "").strip()))
     banned = {"[ Silence ]", "[silence]", ""}
     if text in banned or len(text.replace("\n","" ).strip()) == 0:
-        notify("⚠️ Nothing to paste (empty transcript)")
-        set_status_safe("🔇 Empty transcript", Theme.WARNING, Theme.BG_DARK, Theme.WARNING)
-        return
+        return ""
+    return text
+
 
+_paste_seq = 0               # bumped on every paste, so a late refinement never clobbers a newer one
+_last_user_key_ts = 0.0      # updated by a keyboard hook installed in main()
+pending_refinement = None    # (draft_text, refined_text) waiting for the refine hotkey
+
+def _paste_text(text):
+    """Paste text at the cursor. Returns True on success."""
+    global _paste_seq
     try:
-        text = postprocess(text)
-        
-        # Record stats BEFORE pasting
-        stats_tracker.record_transcription(text)
-        
         pyperclip.copy(text)
         time.sleep(0.05)
         pyautogui.hotkey("ctrl", "v")
+        _paste_seq += 1
         notify("✅ Pasted successfully!")
-        set_status_safe("✅ Pasted!", Theme.SUCCESS, Theme.TEXT_PRIMARY, Theme.SUCCESS)
-        threading.Timer(2.0, lambda: set_status_safe("🎤 Ready", Theme.BG_ELEVATED, Theme.TEXT_PRIMARY, Theme.PINK_PRIMARY)).start()
+        set_job_status("✅ Pasted!", Theme.SUCCESS, Theme.TEXT_PRIMARY, Theme.SUCCESS)
+        threading.Timer(2.0, settle_status).start()
         safe_print("Pasted OK")
+        return True
     except Exception as e:
         safe_print(f"Paste error: {e}")
         notify("❌ Copy/Paste error")
-        set_status_safe("❌ Paste error", Theme.ERROR, Theme.TEXT_PRIMARY, Theme.ERROR)
+        set_job_status("❌ Paste error", Theme.ERROR, Theme.TEXT_PRIMARY, Theme.ERROR)
+        return False
+
+
+def _foreground_window():
+    try:
+        return ctypes.windll.user32.GetForegroundWindow()
+    except Exception:
+        return None
+
+
+class _LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+
+def _last_input_tick():
+    """GetTickCount() time of the last keyboard or mouse input, or None off Windows."""
+    try:
+        info = _LASTINPUTINFO(ctypes.sizeof(_LASTINPUTINFO), 0)
+        if ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return info.dwTime
+    except Exception:
+        pass
+    return None
+
+
+def _wait_modifiers_released(timeout=3.0):
+    """Wait until Ctrl, Alt, Shift and Win are all up. False on timeout."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if not any(keyboard.is_pressed(k) for k in ("ctrl", "alt", "shift", "windows")):
+                return True
+        except Exception:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _replace_pasted(old_text, new_text):
+    """Select the len(old_text) characters left of the cursor and paste new_text over them."""
+    pyperclip.copy(new_text)
+    pyautogui.keyDown("shift")
+    try:
+        pyautogui.press("left", presses=len(old_text), interval=0)
+    finally:
+        pyautogui.keyUp("shift")
+    time.sleep(0.05)
+    pyautogui.hotkey("ctrl", "v")
+
+
+def _refine_pasted(audio, bin_path, draft_text):
+    """Re-decode with the full model and upgrade the pasted draft if it changed.
+
+    The draft is replaced in place only while the same window has focus and
+    there was no key press or mouse input since the paste (a click elsewhere
+    in the document would move the caret); otherwise the correction is
+    offered on the refine hotkey.
+    """
+    global pending_refinement
+    seq = _paste_seq
+    hwnd = _foreground_window()
+    pasted_at = time.time()
+    pasted_tick = _last_input_tick()
+    try:
+        rc, out, _err = run_whisper(audio, bin_path, MODEL_PATH)
+    except JobCancelled as e:
+        safe_print(f"[refine] {e.reason}; draft kept")
+        return
+    refined = postprocess(_clean_transcript(out)) if rc == 0 else ""
+    if not refined or refined == draft_text:
+        safe_print("[refine] draft kept")
+        return
+    if _paste_seq != seq:
+        safe_print("[refine] newer paste since draft; dropping refinement")
+        return
+    # ignore our own injected Ctrl+V, which the hook may see just after the paste
+    untouched = _last_user_key_ts < pasted_at + 0.3
+    tick = _last_input_tick()
+    if tick is not None and pasted_tick is not None:
+        untouched = untouched and ((tick - pasted_tick) & 0xFFFFFFFF) < 300
+    if _foreground_window() == hwnd and untouched:
+        try:
+            _replace_pasted(draft_text, refined)
+            log_line(f"[refine] replaced draft ({len(draft_text)} -> {len(refined)} chars)")
+            return
+        except Exception as e:
+            safe_print(f"[refine] replace error: {e}")
+    pending_refinement = (draft_text, refined)
+    notify(f"✏️ Refined text ready - press {REFINE_HOTKEY.upper()} to apply")
+
+
+def apply_pending_refinement():
+    """Refine hotkey: replace the draft left of the cursor with the refined text."""
+    global pending_refinement
+    pending = pending_refinement
+    if pending is None:
+        return
+    # the hotkey fires on key-down; injected Shift+Left / Ctrl+V with Ctrl+Alt
+    # still held would select by word and open Paste Special
+    if not _wait_modifiers_released():
+        notify(f"✏️ Release the keys after {REFINE_HOTKEY.upper()} to apply the refinement")
+        return
+    if pending_refinement is not pending:
+        return
+    pending_refinement = None
+    try:
+        _replace_pasted(*pending)
+        notify("✏️ Refinement applied")
+    except Exception as e:
+        safe_print(f"[refine] apply error: {e}")
+
+
+def _transcribe(audio, stream=None):
+    """Decode one recording; returns (text, bin_path, draft) or None when there is nothing to paste."""
+    safe_print("[whisper] running...")
+    set_job_status("⚙️ Transcribing...", Theme.BG_ELEVATED, Theme.INFO, Theme.INFO)
+    bin_path = (resolved_whisper_bin or WHISPER_BIN)
+    draft = DRAFT_REFINE and stream is None and os.path.exists(DRAFT_MODEL) and DRAFT_MODEL != MODEL_PATH
+    if stream is not None:
+        rc, out, err = stream.finish(audio)
+    elif draft:
+        rc, out, err = run_whisper(audio, bin_path, DRAFT_MODEL)
+        if rc != 0 or not _clean_transcript(out):
+            safe_print("[whisper] draft failed; decoding with the full model")
+            draft = False
+            rc, out, err = run_whisper(audio, bin_path, MODEL_PATH)
+    else:
+        rc, out, err = run_whisper(audio, bin_path)
+
+    if rc != 0:
+        notify("❌ Transcription failed")
+        set_job_status("❌ Failed", Theme.ERROR, Theme.TEXT_PRIMARY, Theme.ERROR)
+        safe_print(f"[whisper] exit={rc} stderr={err[:400]}")
+        return None
+
+    text = _clean_transcript(out)
+    if not text:
+        notify("⚠️ Nothing to paste (empty transcript)")
+        set_job_status("🔇 Empty transcript", Theme.WARNING, Theme.BG_DARK, Theme.WARNING)
+        return None
+
+    return postprocess(text), bin_path, draft
+
+
+def _deliver(audio, text, bin_path, draft):
+    """Paste one finished transcript and start its refinement pass.
+
+    Returns the refinement thread, or None.
+    """
+    global pending_refinement
+    # Record stats BEFORE pasting
+    stats_tracker.record_transcription(text)
+
+    pending_refinement = None
+    if _paste_text(text) and draft:
+        refine = threading.Thread(target=_refine_pasted, args=(audio, bin_path, text), daemon=True)
+        refine.start()
+        return refine
+    return None
+
+
+# --- Dictation queue ---
+class DictationQueue:
+    """Finished recordings waiting to be transcribed and pasted.
+
+    Capture only needs the microphone, so the next utterance can be recorded
+    while earlier ones decode. Jobs are numbered as they are submitted and
+    each waits for its predecessors before pasting, so text always lands in
+    the order it was spoken even with several decode workers. Pastes are
+    also held while the next recording's hotkey is down: the injected Ctrl+V
+    would end that recording and reach the app as Win+Ctrl+V.
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.jobs = queue.Queue()
+        self.cond = threading.Condition()
+        self.next_seq = 0     # number given to the next submitted job
+        self.next_paste = 0   # job allowed to paste next
+        self.running = {}     # seq -> TranscriptionJob being decoded
+        self.workers = [threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))]
+        for t in self.workers:
+            t.start()
+
+    def depth(self):
+        """Jobs submitted but not yet pasted."""
+        with self.cond:
+            return self.next_seq - self.next_paste
+
+    def has_room(self):
+        return self.depth() < JOB_BACKLOG_MAX
+
+    def submit(self, audio, stream=None):
+        with self.cond:
+            seq = self.next_seq
+            self.next_seq += 1
+        self.jobs.put((seq, audio, stream))
+        self._show_depth()
+        return seq
+
+    def cancel_current(self):
+        """Cancel the oldest job being decoded. Returns False if none is running.
+
+        Safe to call from the Tk loop or a hotkey callback: the process kill,
+        which can wait seconds, happens on its own thread.
+        """
+        with self.cond:
+            if not self.running:
+                return False
+            job = self.running[min(self.running)]
+        threading.Thread(target=job.cancel, args=("cancelled",), daemon=True).start()
+        return True
+
+    def preempt_stale(self):
+        """Cancel jobs running JOB_STALE_SEC longer than their audio, so they stop blocking new ones."""
+        now = time.time()
+        with self.cond:
+            jobs = list(self.running.values())
+        for job in jobs:
+            if now - job.started > JOB_STALE_SEC + job.duration_sec:
+                threading.Thread(target=job.cancel, args=("pre-empted",), daemon=True).start()
+
+    def wait_idle(self, timeout=None):
+        """Block until every submitted job has been pasted; False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.next_paste == self.next_seq, timeout)
+
+    def capture_ended(self):
+        """Let pastes held back during a recording go out, in order."""
+        with self.cond:
+            self.cond.notify_all()
+
+    def _show_depth(self):
+        try:
+            ui_queue.put((gui.set_queue_depth, (self.depth(),)))
+        except Exception:
+            pass
+
+    def _worker(self):
+        while True:
+            seq, audio, stream = self.jobs.get()
+            pauses = None
+            if PAUSE_COMPRESS and stream is None and isinstance(audio, np.ndarray):
+                # streamed jobs already decoded windows of the original audio
+                audio, pauses = compress_pauses(audio)
+            job = TranscriptionJob(_audio_duration(audio))
+            job.pause_map = pauses
+            if pauses is not None:
+                log_line(f"[pauses] removed {pauses.removed / SAMPLE_RATE:.1f}s of silence")
+            with self.cond:
+                self.running[seq] = job
+            try:
+                with job_scope(job):
+                    result = _transcribe(audio, stream)
+            except JobCancelled as e:
+                if stream is not None:
+                    stream.cancel()
+                notify("⏱️ Transcription timed out" if e.reason == "deadline" else f"⏹️ Transcription {e.reason}")
+                log_line(f"[queue] job {seq} {e.reason}")
+                result = None
+            except Exception as e:
+                log_line(f"[queue] job {seq} failed: {e}")
+                result = None
+            finally:
+                with self.cond:
+                    self.running.pop(seq, None)
+            with self.cond:
+                while self.next_paste != seq or (result is not None and capturing()):
+                    self.cond.wait()
+            refine = None
+            try:
+                if result is not None:
+                    refine = _deliver(audio, *result)
+            except Exception as e:
+                log_line(f"[queue] job {seq} paste failed: {e}")
+            finally:
+                remove_spill_file(audio, after=refine)
+                with self.cond:
+                    self.next_paste += 1
+                    self.cond.notify_all()
+                self._show_depth()
+                if result is None:
+                    threading.Timer(2.0, settle_status).start()
+
+
+dictation_queue = DictationQueue()
 
 
 def stop_recording_and_transcribe():
     with STATE_LOCK:
-        if not recording_flag.is_set() or transcribing_flag.is_set():
+        if not recording_flag.is_set() or stop_pending.is_set():
             return
-        transcribing_flag.set()
+        stop_pending.set()
 
     try:
         time.sleep(POSTROLL_SEC)
@@ -1932,21 +4733,18 @@ def stop_recording_and_transcribe():
     if rec_thread:
         rec_thread.join()
 
-    if not os.path.exists(WAV_TMP) or os.path.getsize(WAV_TMP) < 1024:
-        try:
-            if os.path.exists(WAV_TMP):
-                os.remove(WAV_TMP)
-        except Exception:
-            pass
+    audio = captured_audio
+    stream = active_stream
+    stop_pending.clear()
+    dictation_queue.capture_ended()
+    if audio is None or (isinstance(audio, np.ndarray) and len(audio) < 512):
+        if stream is not None:
+            stream.cancel()
         notify("No speech detected")
-        with STATE_LOCK:
-            transcribing_flag.clear()
         return
 
-    _transcribe_and_paste(WAV_TMP)
-
-    with STATE_LOCK:
-        transcribing_flag.clear()
+    dictation_queue.submit(audio, stream)
+    settle_status()
 
 def on_hotkey_press(e):
     if not recording_flag.is_set():
@@ -1958,6 +4756,22 @@ def on_hotkey_release(e):
 
 
 # --- Diagnostics ---
+def _diag_run(cmd, sample, exe):
+    """Run a diagnostic whisper command, or replay its output from the transcript cache.
+
+    Returns (returncode, stdout, stderr).
+    """
+    key = transcript_cache.key(sample, MODEL_PATH, ["diag", *cmd[1:]], exe) if TRANSCRIPT_CACHE else None
+    cached = transcript_cache.get(key) if key else None
+    if isinstance(cached, dict):
+        log_line("[diag] cached result")
+        return cached["rc"], cached["stdout"], cached["stderr"]
+    res = subprocess.run(cmd, capture_output=True, text=True, timeout=WHISPER_TIMEOUT_SEC)
+    if key and res.returncode == 0 and (res.stdout or "").strip():
+        transcript_cache.put(key, {"rc": res.returncode, "stdout": res.stdout or "", "stderr": res.stderr or ""})
+    return res.returncode, res.stdout or "", res.stderr or ""
+
+
 def self_test_jfk():
     sample = os.path.join("whisper.cpp", "samples", "jfk.wav")
     if not os.path.exists(sample):
@@ -1970,8 +4784,8 @@ def self_test_jfk():
     cmd = build_whisper_cmd(exe, MODEL_PATH, sample, base_args=["-nt"]) 
     log_line("[self-test] running: " + " ".join(cmd))
     try:
-        res = subprocess.run(cmd, capture_output=True, text=True, timeout=WHISPER_TIMEOUT_SEC)
-        out = (res.stdout or "").strip() or (res.stderr or "").strip()
+        _rc, stdout, stderr = _diag_run(cmd, sample, exe)
+        out = stdout.strip() or stderr.strip()
         if out:
             notify("Self-test OK (see log)")
             log_line("[self-test-output]\n" + out)
@@ -1981,6 +4795,69 @@ def self_test_jfk():
         notify(f"Self-test error: {e}")
 
 
+def autotune(model_path=None):
+    """Time AUTOTUNE_CLIP over a grid of -t / flash-attn / -p and save the fastest per device.
+
+    Thread counts tried are half the physical cores, the physical cores and
+    all logical CPUs; processor splits (-p) only on the CPU. Each setting is
+    timed once after a warm-up run, model load included, as in dictation.
+    """
+    global resolved_whisper_bin
+    model_path = model_path or MODEL_PATH
+    resolved_whisper_bin = find_whisper_bin()
+    if resolved_whisper_bin is None or not os.path.exists(AUTOTUNE_CLIP) or not os.path.exists(model_path):
+        safe_print(f"Autotune needs a whisper binary, {AUTOTUNE_CLIP} and {model_path}")
+        return
+    exe = os.path.abspath(_resolve_whisper_exe(resolved_whisper_bin))
+    workdir = os.path.dirname(exe) or "."
+    clip = os.path.abspath(AUTOTUNE_CLIP)
+    phys = physical_core_count()
+    threads_grid = sorted({max(1, phys // 2), phys, os.cpu_count() or phys})
+    safe_print(f"[autotune] {machine_fingerprint()} | {os.path.basename(model_path)} | {phys} physical cores")
+
+    def _time(args):
+        cmd = build_whisper_cmd(exe, model_path, clip, base_args=["-l", "en", "-nt", *args])
+        t0 = time.time()
+        try:
+            res = subprocess.run(cmd, cwd=workdir, env=_cli_env(), capture_output=True, text=True,
+                                 timeout=WHISPER_TIMEOUT_SEC, creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        except subprocess.TimeoutExpired:
+            return None
+        if res.returncode != 0 or not (res.stdout or "").strip():
+            return None
+        return time.time() - t0
+
+    for device in ("gpu", "cpu"):
+        device_args = [] if device == "gpu" else ["--no-gpu"]
+        if _time(["-t", str(phys), *device_args]) is None:
+            safe_print(f"[autotune] {device}: warm-up run failed; skipping")
+            continue
+        best = None
+        for threads in threads_grid:
+            for flash_attn in (False, True):
+                for processors in ((1,) if device == "gpu" else (1, 2)):
+                    args = ["-t", str(threads), "-fa" if flash_attn else "-nfa", *device_args]
+                    if processors > 1:
+                        args += ["-p", str(processors)]
+                    wall = _time(args)
+                    desc = f"t={threads} fa={'on' if flash_attn else 'off'} p={processors}"
+                    safe_print(f"[autotune] {device} {desc}: " + (f"{wall:.2f}s" if wall is not None else "failed"))
+                    if wall is not None and (best is None or wall < best[0]):
+                        best = (wall, threads, flash_attn, processors)
+        if best is None:
+            continue
+        wall, threads, flash_attn, processors = best
+        hw_profile.set(model_path, device, {
+            "threads": threads,
+            "flash_attn": flash_attn,
+            "processors": processors,
+            "wall_sec": round(wall, 3),
+            "tuned": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        safe_print(f"[autotune] {device}: best t={threads} fa={'on' if flash_attn else 'off'} p={processors} ({wall:.2f}s)")
+    safe_print(f"[autotune] saved to {HW_PROFILE_FILE}")
+
+
 def run_debug_probe():
     sample = os.path.join("whisper.cpp", "samples", "jfk.wav")
     if not os.path.exists(sample):
@@ -2001,15 +4878,15 @@ def run_debug_probe():
         cmd = build_whisper_cmd(exe, MODEL_PATH, sample, base_args=["-nt"]) 
         log_line(f"[debug] running: {' '.join(cmd)}")
         try:
-            res = subprocess.run(cmd, capture_output=True, text=True, timeout=WHISPER_TIMEOUT_SEC)
-            raw = (res.stdout or "") + ("\n" + res.stderr if res.stderr else "")
+            rc, stdout, stderr = _diag_run(cmd, sample, exe)
+            raw = stdout + ("\n" + stderr if stderr else "")
             san = sanitize_transcript(raw)
             with open(os.path.join("debug", f"flow_debug_{name}_raw.txt"), "w", encoding="utf-8") as f:
                 f.write(raw)
             with open(os.path.join("debug", f"flow_debug_{name}_sanitized.txt"), "w", encoding="utf-8") as f:
                 f.write(san)
             banner_present = ("deprecated" in raw.lower()) or ("please use" in raw.lower())
-            log_line(f"[debug] {name}: rc={res.returncode} banner={'yes' if banner_present else 'no'}; files in ./debug/")
+            log_line(f"[debug] {name}: rc={rc} banner={'yes' if banner_present else 'no'}; files in ./debug/")
         except Exception as e:
             log_line(f"[debug] error running {name}: {e}")
     notify("Debug probe complete (see ./debug and log)")
@@ -2017,6 +4894,123 @@ def run_debug_probe():
 tray_icon = None
 listening_enabled = True
 
+# --- Batch transcription ---
+def _batch_inputs(specs):
+    """Audio files named by directories (searched recursively) and glob patterns, sorted."""
+    files = set()
+    for spec in specs:
+        if os.path.isdir(spec):
+            for root, _dirs, names in os.walk(spec):
+                files.update(os.path.join(root, n) for n in names if n.lower().endswith(BATCH_EXTENSIONS))
+        else:
+            files.update(p for p in glob.glob(spec, recursive=True) if os.path.isfile(p))
+    return sorted(os.path.abspath(p) for p in files)
+
+
+def _batch_key(path):
+    st = os.stat(path)
+    return f"{path}|{st.st_size}|{int(st.st_mtime)}"
+
+
+def _batch_done(out_path):
+    """Keys of files already transcribed successfully in out_path."""
+    done = set()
+    try:
+        with open(out_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if rec.get("rc") == 0 and rec.get("key"):
+                    done.add(rec["key"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _batch_one(path, bin_path, model_path):
+    duration_sec = _audio_duration(path)
+    job = TranscriptionJob(duration_sec)
+    t0 = time.time()
+    with job_scope(job):
+        try:
+            rc, out, err = run_whisper(path, bin_path, model_path)
+        except JobCancelled as e:
+            rc, out, err = -1, "", f"job {e.reason}"
+    rec = {
+        "file": path,
+        "key": _batch_key(path),
+        "rc": rc,
+        "text": postprocess(_clean_transcript(out)) if rc == 0 else "",
+        "duration_sec": round(duration_sec, 2) if duration_sec else None,
+        "wall_sec": round(time.time() - t0, 2),
+        **job.info,
+        "ts": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    if rc != 0:
+        rec["error"] = (err or "")[:500]
+    return rec
+
+
+def batch_main(argv):
+    """Transcribe many files with the dictation engine, one JSONL record per file.
+
+    No pill, tray, keyboard hooks or single-instance lock. Records are
+    appended as each file finishes, and files already recorded with rc 0
+    (same path, size and mtime) are skipped, so an interrupted run can simply
+    be started again.
+    """
+    global resolved_whisper_bin
+    import argparse
+    parser = argparse.ArgumentParser(prog="flow_local_dictation.py batch")
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns")
+    parser.add_argument("--out", default=BATCH_OUT, help=f"JSONL output (default {BATCH_OUT})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"concurrent decodes (default {BATCH_WORKERS}, or cores/{PIN_CORES_PER_WORKER} with --pin)")
+    parser.add_argument("--pin", action="store_true", help="pin each worker to its own physical cores")
+    parser.add_argument("--model", default=None, help="model file (default: routed per file)")
+    args = parser.parse_args(argv)
+
+    resolved_whisper_bin = find_whisper_bin()
+    if resolved_whisper_bin is None:
+        print("Missing whisper binary (checked multiple locations)")
+        return 1
+    if args.workers is None:
+        args.workers = max(1, physical_core_count() // PIN_CORES_PER_WORKER) if args.pin else BATCH_WORKERS
+    core_pool = CorePool(args.workers) if args.pin else None
+    run_one = (lambda *a: core_pool.run(_batch_one, *a)) if core_pool else _batch_one
+    files = _batch_inputs(args.inputs)
+    done = _batch_done(args.out)
+    todo = [p for p in files if _batch_key(p) not in done]
+    print(f"[batch] {len(files)} files, {len(files) - len(todo)} already done, {len(todo)} to go ({args.workers} workers)")
+
+    out_lock = threading.Lock()
+    failed = 0
+    # Each decode runs in its own whisper-cli process, so threads are enough to keep args.workers of them busy.
+    try:
+        with open(args.out, "a", encoding="utf-8") as out, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = {pool.submit(run_one, p, resolved_whisper_bin, args.model): p for p in todo}
+            for n, fut in enumerate(concurrent.futures.as_completed(futures), 1):
+                try:
+                    rec = fut.result()
+                except Exception as e:
+                    path = futures[fut]
+                    rec = {"file": path, "key": _batch_key(path), "rc": -1, "error": str(e)}
+                failed += rec["rc"] != 0
+                with out_lock:
+                    out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    out.flush()
+                    os.fsync(out.fileno())
+                print(f"[batch] {n}/{len(todo)} {os.path.basename(rec['file'])}: "
+                      + (f"{len(rec['text'])} chars in {rec['wall_sec']}s" if rec["rc"] == 0 else f"failed ({rec['rc']})"))
+    finally:
+        shutdown_engines()
+    print(f"[batch] done, {failed} failed; results in {args.out}")
+    return 1 if failed else 0
+
+
 def _tray_update(title="Whisper Local", text="Idle"):
     try:
         if tray_icon:
@@ -2058,7 +5052,9 @@ def _tray_quit(_=None):
     try:
         if recording_flag.is_set():
             stop_recording_and_transcribe()
+        dictation_queue.wait_idle(WHISPER_TIMEOUT_SEC)
     finally:
+        shutdown_engines()
         os._exit(0)
 
 def start_tray():
@@ -2096,16 +5092,24 @@ def main():
     safe_print("📌 Controls:")
     safe_print("  • Hold WIN + CTRL to record")
     safe_print("  • Release to transcribe & paste")
-    safe_print("  • Click floating pill to open dashboard")
+    safe_print("  • Click floating pill to open dashboard (or cancel while processing)")
+    safe_print(f"  • {CANCEL_HOTKEY.upper()} to cancel a transcription")
     safe_print("  • WIN + CTRL + S for settings")
     safe_print("  • ESC to exit")
     safe_print("=" * 60)
+
+    _acquire_single_instance()
+    clear_spill_files()
     
     global gui
     gui = FloatingPill()
     gui.set_status("ready")
     
     startup_diagnostics()
+
+    open_live_input()
+
+    get_backend()  # load a resident model now, not on the first dictation
     
     try:
         device_lines = devices_summary_text()
@@ -2114,6 +5118,7 @@ def main():
         safe_print(f"✅ Microphone: {selected_input_device_name}")
         safe_print(f"✅ Model: {os.path.basename(MODEL_PATH)}")
         safe_print(f"✅ Whisper binary: {resolved_whisper_bin}")
+        safe_print(f"✅ Engine: {ENGINE}")
         safe_print("=" * 60)
     except Exception:
         pass
@@ -2125,6 +5130,13 @@ def main():
     keyboard.add_hotkey("ctrl+alt+j", lambda: threading.Thread(target=self_test_jfk, daemon=True).start())
     keyboard.add_hotkey("ctrl+alt+d", lambda: threading.Thread(target=run_debug_probe, daemon=True).start())
     keyboard.add_hotkey("ctrl+alt+b", lambda: set_bullet_next())
+    keyboard.add_hotkey(REFINE_HOTKEY, lambda: threading.Thread(target=apply_pending_refinement, daemon=True).start())
+    keyboard.add_hotkey(CANCEL_HOTKEY, lambda: dictation_queue.cancel_current())
+
+    def _note_user_key(e):
+        global _last_user_key_ts
+        _last_user_key_ts = time.time()
+    keyboard.on_press(_note_user_key)
 
     def poll_hotkey():
         nonlocal was_down
@@ -2159,8 +5171,19 @@ def main():
     gui.root.mainloop()
     if recording_flag.is_set():
         stop_recording_and_transcribe()
+    dictation_queue.wait_idle(WHISPER_TIMEOUT_SEC)
+    if live_input is not None:
+        live_input.close()
+    shutdown_engines()
     safe_print("Bye.")
 
 if __name__ == "__main__":
-    start_tray()
-    main()
+    if sys.argv[1:2] == ["batch"]:
+        sys.exit(batch_main(sys.argv[2:]))
+    elif sys.argv[1:2] == ["bench-capture"]:
+        bench_capture_converter()
+    elif sys.argv[1:2] == ["autotune"]:
+        autotune(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        start_tray()
+        main()